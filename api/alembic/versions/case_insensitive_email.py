@@ -0,0 +1,32 @@
+"""
+Case-insensitive email uniqueness.
+
+Replaces the unique index on users.email with a unique index on
+lower(email), so mixed-case duplicates are rejected and case-insensitive
+lookups stay indexed. Fails if the table already holds emails differing
+only in case; those must be merged first.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision = 'case_insensitive_email'
+down_revision = 'initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index users by lowercased email."""
+    op.create_index(
+        'ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True
+    )
+    op.drop_index('ix_users_email', table_name='users')
+
+
+def downgrade() -> None:
+    """Index users by email as stored."""
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.drop_index('ix_users_email_lower', table_name='users')
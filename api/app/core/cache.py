@@ -1,59 +1,406 @@
 """
-Redis cache utilities.
+Cache utilities.
 
-This module provides Redis connection and caching utilities.
-Note: Redis instance runs on external infrastructure server.
+This module provides the application's caching layer: payload encoding,
+read-through lookups, generation-based invalidation and cache keys, on top
+of the storage backend selected by configuration.
 """
 
-from typing import Optional
+import asyncio
+import hashlib
+import zlib
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
-import redis.asyncio as redis
-from redis.asyncio import Redis
+import msgpack
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache_backends import CacheBackend, create_cache_backend
 from app.core.config import settings
+from app.core.database import after_commit
+from app.core.metrics import metrics
 
-_redis_client: Optional[Redis] = None
+# Loads currently in progress on this worker, keyed by cache key
+_inflight: Dict[str, asyncio.Future] = {}
+_refresh_tasks: Set[asyncio.Task] = set()
+_invalidation_retries: Set[asyncio.Task] = set()
 
+# Bump when the format of cached payloads changes so that a rollout never
+# reads entries written by an incompatible release
+CACHE_SCHEMA_VERSION = 1
 
-async def get_redis() -> Optional[Redis]:
-    """Get Redis client instance."""
-    global _redis_client
+# Session.info key holding the invalidations deferred until commit
+_PENDING_INVALIDATIONS = "pending_cache_invalidations"
+
+# Generation counters must outlive every entry derived from them
+_GENERATION_TTL_SECONDS = 86400
+
+# A failed invalidation batch is retried once, after this long
+_INVALIDATION_RETRY_DELAY_SECONDS = 1.0
+
+# Leading byte of every cached payload, describing how the body is encoded
+_ENCODING_RAW = b"\x00"
+_ENCODING_ZLIB = b"\x01"
+_ENCODING_MISSING = b"\x02"
+
+# Returned by cache_get for negative entries, which record that the backing
+# data does not exist
+MISSING: Any = object()
+
+
+@lru_cache()
+def get_cache() -> Optional[CacheBackend]:
+    """Get the configured cache backend, or None if caching is disabled."""
+    return create_cache_backend()
+
+
+async def start_cache() -> None:
+    """Start the cache backend's background work."""
+    backend = get_cache()
+    if backend is not None:
+        await backend.start()
+
+
+async def close_cache() -> None:
+    """Close the cache backend."""
+    backend = get_cache()
+    if backend is not None:
+        await backend.close()
+
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a value into a compact cache payload."""
+    packed = msgpack.packb(value, use_bin_type=True)
+    
+    if (
+        settings.CACHE_COMPRESSION_ENABLED
+        and len(packed) >= settings.CACHE_COMPRESSION_MIN_BYTES
+    ):
+        return _ENCODING_ZLIB + zlib.compress(packed, 1)
     
-    if not settings.REDIS_ENABLED:
+    return _ENCODING_RAW + packed
+
+
+def decode_value(payload: bytes) -> Any:
+    """Deserialize a cache payload produced by encode_value."""
+    encoding, body = payload[:1], payload[1:]
+    
+    if encoding == _ENCODING_MISSING:
+        return MISSING
+    elif encoding == _ENCODING_ZLIB:
+        body = zlib.decompress(body)
+    elif encoding != _ENCODING_RAW:
+        raise ValueError("Unknown cache payload encoding")
+    
+    return msgpack.unpackb(body, raw=False)
+
+
+async def _cache_lookup(key: str) -> Tuple[Optional[Any], Optional[float]]:
+    """Look a key up in the cache backend.
+    
+    Returns the cached value and, when the backend knows it, the number of
+    seconds left before the entry expires.
+    """
+    backend = get_cache()
+    if backend is None:
+        return None, None
+    
+    try:
+        payload, remaining = await backend.get(key)
+        if payload is None:
+            return None, None
+        return decode_value(payload), remaining
+    except Exception:
+        # Cache error shouldn't break the app
+        return None, None
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """Get a cached value.
+    
+    Returns None on miss or cache failure, and MISSING for negative entries.
+    """
+    value, _ = await _cache_lookup(key)
+    return value
+
+
+async def cache_get_or_load(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int,
+    refresher: Optional[Callable[[], Awaitable[Any]]] = None,
+    negative_ttl: Optional[int] = None,
+) -> Any:
+    """Read-through lookup that coalesces concurrent misses.
+    
+    Only one loader per key runs at a time on this worker; concurrent callers
+    wait for and share its result. When refresh-ahead is enabled and a
+    refresher is given, an entry close to expiry is reloaded in the
+    background. The refresher must not depend on request-scoped state such
+    as the request's database session.
+    
+    A loader returns None when the data does not exist. With negative_ttl
+    set, that outcome is cached as a negative entry for negative_ttl seconds
+    and later lookups return None without calling the loader.
+    """
+    value, remaining = await _cache_lookup(key)
+    
+    if value is MISSING:
         return None
     
-    if _redis_client is None:
+    if value is not None:
+        if (
+            refresher is not None
+            and remaining is not None
+            and remaining < settings.CACHE_REFRESH_AHEAD_SECONDS
+            and key not in _inflight
+        ):
+            task = asyncio.create_task(_refresh(key, refresher, ttl, negative_ttl))
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+        return value
+    
+    return await _load_single_flight(key, loader, ttl, negative_ttl)
+
+
+async def _load_single_flight(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int,
+    negative_ttl: Optional[int] = None,
+) -> Any:
+    """Run loader for key unless another caller already is, then cache it."""
+    while key in _inflight:
+        future = _inflight[key]
         try:
-            _redis_client = await redis.from_url(
-                settings.REDIS_URL,
-                encoding="utf-8",
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-            )
-        except Exception:
-            # If Redis is unavailable, log but don't fail
-            # Application should work without cache
-            return None
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Only take over if the leader was cancelled, not this caller
+            if not future.cancelled():
+                raise
+    
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        value = await loader()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Mark the exception as retrieved in case nobody was waiting
+        future.exception()
+        raise
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+    
+    future.set_result(value)
+    if value is not None:
+        await cache_set(key, value, ttl)
+    elif negative_ttl:
+        await cache_set_missing(key, negative_ttl)
+    return value
+
+
+async def _refresh(
+    key: str,
+    refresher: Callable[[], Awaitable[Any]],
+    ttl: int,
+    negative_ttl: Optional[int],
+) -> None:
+    """Reload an entry ahead of its expiry."""
+    try:
+        await _load_single_flight(key, refresher, ttl, negative_ttl)
+    except Exception:
+        # The entry simply expires and is reloaded on the next miss
+        pass
+
+
+async def cache_set(key: str, value: Any, ttl: int) -> None:
+    """Cache a value for ttl seconds."""
+    backend = get_cache()
+    if backend is None:
+        return
+    
+    try:
+        await backend.set(key, encode_value(value), ttl)
+    except Exception:
+        pass
+
+
+async def cache_add(key: str, value: Any, ttl: int) -> bool:
+    """Cache a value for ttl seconds unless key already holds one.
+    
+    Returns whether the value was stored; False on cache failure too.
+    Used where concurrent writers must agree on a single value.
+    """
+    backend = get_cache()
+    if backend is None:
+        return False
+    
+    try:
+        return await backend.add(key, encode_value(value), ttl)
+    except Exception:
+        return False
+
+
+async def cache_pop(key: str) -> Optional[Any]:
+    """Atomically get and remove a cached value.
+    
+    Returns None on miss or cache failure. Used for single-use entries,
+    which only one caller across all workers may consume.
+    """
+    backend = get_cache()
+    if backend is None:
+        return None
     
-    return _redis_client
+    try:
+        payload = await backend.pop(key)
+        return decode_value(payload) if payload is not None else None
+    except Exception:
+        return None
+
+
+async def cache_set_missing(key: str, ttl: int) -> None:
+    """Record for ttl seconds that the data behind key does not exist."""
+    backend = get_cache()
+    if backend is None:
+        return
+    
+    try:
+        await backend.set(key, _ENCODING_MISSING, ttl)
+    except Exception:
+        pass
 
 
-async def close_redis() -> None:
-    """Close Redis connection."""
-    global _redis_client
-    if _redis_client:
-        await _redis_client.close()
-        _redis_client = None
+async def cache_delete(*keys: str) -> None:
+    """Remove cached values and notify other workers in a single round trip."""
+    batch = CacheInvalidationBatch()
+    batch.delete(*keys)
+    await batch.flush()
+
+
+async def get_generation(key: str) -> Optional[int]:
+    """Get the generation counter stored at key.
+    
+    Returns 0 when caching is disabled, and None if the counter could not be
+    read, in which case callers should bypass the cache.
+    """
+    backend = get_cache()
+    if backend is None:
+        return 0
+    
+    try:
+        return await backend.get_generation(key)
+    except Exception:
+        return None
+
+
+async def bump_generation(key: str) -> None:
+    """Advance a generation counter, orphaning every entry keyed on it."""
+    batch = CacheInvalidationBatch()
+    batch.bump_generation(key)
+    await batch.flush()
+
+
+class CacheInvalidationBatch:
+    """Cache invalidations and change events applied together.
+    
+    Everything queued on a batch is sent to Redis in one pipelined round
+    trip when it is flushed. A batch that fails is retried once in the
+    background and counted in cache_invalidation_batches_dropped_total if
+    that fails too, since its entries then stay stale until they expire.
+    """
+    
+    def __init__(self):
+        self.keys: Set[str] = set()
+        self.generations: Set[str] = set()
+        self.events: List[Tuple[str, Any]] = []
+    
+    def delete(self, *keys: str) -> None:
+        """Queue cached values for removal."""
+        self.keys.update(keys)
+    
+    def bump_generation(self, key: str) -> None:
+        """Queue a generation counter to be advanced."""
+        self.generations.add(key)
+    
+    def publish(self, channel: str, message: Any) -> None:
+        """Queue a change event for publication."""
+        self.events.append((channel, message))
+    
+    async def flush(self) -> None:
+        """Apply everything queued so far and reset the batch."""
+        keys, generations, events = self.keys, self.generations, self.events
+        self.keys, self.generations, self.events = set(), set(), []
+        
+        backend = get_cache()
+        if backend is None or not (keys or generations or events):
+            return
+        
+        encoded_events = [(channel, encode_value(message)) for channel, message in events]
+        try:
+            await backend.invalidate(keys, generations, _GENERATION_TTL_SECONDS, encoded_events)
+        except Exception:
+            task = asyncio.create_task(
+                _retry_invalidation(backend, keys, generations, encoded_events)
+            )
+            _invalidation_retries.add(task)
+            task.add_done_callback(_invalidation_retries.discard)
+
+
+async def _retry_invalidation(
+    backend: CacheBackend,
+    keys: Set[str],
+    generations: Set[str],
+    events: List[Tuple[str, bytes]],
+) -> None:
+    """Apply a failed invalidation batch again after a short delay."""
+    metrics.inc("cache_invalidation_retries_total")
+    await asyncio.sleep(_INVALIDATION_RETRY_DELAY_SECONDS)
+    try:
+        await backend.invalidate(keys, generations, _GENERATION_TTL_SECONDS, events)
+    except Exception:
+        metrics.inc("cache_invalidation_batches_dropped_total")
+
+
+def pending_invalidations(session: AsyncSession) -> CacheInvalidationBatch:
+    """Get the batch flushed once the session's transaction commits.
+    
+    Invalidating before the commit would let a concurrent reader refill the
+    cache with pre-commit data; queued work is dropped on rollback.
+    """
+    batch = session.info.get(_PENDING_INVALIDATIONS)
+    if batch is None:
+        batch = CacheInvalidationBatch()
+        session.info[_PENDING_INVALIDATIONS] = batch
+        after_commit(session, batch.flush)
+    return batch
 
 
 class CacheKeys:
-    """Cache key prefixes and utilities."""
+    """Cache key prefixes and utilities.
+    
+    Keys for cached payloads carry the schema version, and keys for data
+    derived from a user's todos also carry that user's generation, so that a
+    single bump invalidates all of them at once.
+    """
     
-    USER_PREFIX = "user:"
-    TODO_PREFIX = "todo:"
-    USER_TODOS_PREFIX = "user_todos:"
+    VERSION_PREFIX = f"v{CACHE_SCHEMA_VERSION}" + (
+        f"-{settings.CACHE_DEPLOY_VERSION}:" if settings.CACHE_DEPLOY_VERSION else ":"
+    )
+    USER_PREFIX = f"{VERSION_PREFIX}user:"
+    TODO_PREFIX = f"{VERSION_PREFIX}todo:"
+    USER_TODOS_PREFIX = f"{VERSION_PREFIX}user_todos:"
+    UNKNOWN_EMAIL_PREFIX = f"{VERSION_PREFIX}unknown_email:"
+    KNOWN_EMAIL_PREFIX = f"{VERSION_PREFIX}known_email:"
+    GENERATION_PREFIX = "generation:"
     RATE_LIMIT_PREFIX = "rate_limit:"
+    PASSWORD_POLICY_PREFIX = "password_policy:"
+    REFRESH_TOKEN_PREFIX = "refresh_token:"
+    REVOKED_TOKEN_PREFIX = "revoked_token:"
+    HEAVY_HITTERS_PREFIX = f"{VERSION_PREFIX}heavy_hitters:"
     
     @staticmethod
     def user_key(user_id: int) -> str:
@@ -61,17 +408,77 @@ class CacheKeys:
         return f"{CacheKeys.USER_PREFIX}{user_id}"
     
     @staticmethod
-    def todo_key(todo_id: int) -> str:
-        """Get cache key for todo."""
-        return f"{CacheKeys.TODO_PREFIX}{todo_id}"
+    def todo_key(todo_id: int, user_id: int, generation: int) -> str:
+        """Get cache key for a todo, scoped to its owner."""
+        return f"{CacheKeys.TODO_PREFIX}{user_id}:g{generation}:{todo_id}"
     
     @staticmethod
-    def user_todos_key(user_id: int) -> str:
+    def user_todos_key(user_id: int, generation: int) -> str:
         """Get cache key for user's todos list."""
-        return f"{CacheKeys.USER_TODOS_PREFIX}{user_id}"
+        return f"{CacheKeys.USER_TODOS_PREFIX}{user_id}:g{generation}"
+    
+    @staticmethod
+    def unknown_email_key(email: str) -> str:
+        """Get negative cache key for an email with no account.
+        
+        The email is lowercased, as lookups ignore case, and hashed so
+        addresses are not stored in key names.
+        """
+        digest = hashlib.sha256(email.lower().encode("utf-8")).hexdigest()
+        return f"{CacheKeys.UNKNOWN_EMAIL_PREFIX}{digest}"
+    
+    @staticmethod
+    def known_email_key(email: str) -> str:
+        """Get cache key for an email known to have an account.
+        
+        The email is lowercased, as lookups ignore case, and hashed so
+        addresses are not stored in key names.
+        """
+        digest = hashlib.sha256(email.lower().encode("utf-8")).hexdigest()
+        return f"{CacheKeys.KNOWN_EMAIL_PREFIX}{digest}"
+    
+    @staticmethod
+    def user_generation_key(user_id: int) -> str:
+        """Get key of the generation counter for a user's todos."""
+        return f"{CacheKeys.GENERATION_PREFIX}user_todos:{user_id}"
     
     @staticmethod
     def rate_limit_key(identifier: str, action: str) -> str:
         """Get cache key for rate limiting."""
         return f"{CacheKeys.RATE_LIMIT_PREFIX}{action}:{identifier}"
-
+    
+    @staticmethod
+    def rate_limit_window_key(identifier: str, action: str, window_id: int) -> str:
+        """Get cache key counting requests in one fixed rate limit window."""
+        return f"{CacheKeys.rate_limit_key(identifier, action)}:w{window_id}"
+    
+    @staticmethod
+    def refresh_token_key(refresh_token: str) -> str:
+        """Get cache key for a refresh token, stored by digest only."""
+        digest = hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+        return f"{CacheKeys.REFRESH_TOKEN_PREFIX}{digest}"
+    
+    @staticmethod
+    def revoked_token_key(token_id: str) -> str:
+        """Get cache key marking an access token as revoked."""
+        return f"{CacheKeys.REVOKED_TOKEN_PREFIX}{token_id}"
+    
+    @staticmethod
+    def revocation_log_key() -> str:
+        """Get cache key of the log of revoked token IDs by revocation time."""
+        return f"{CacheKeys.REVOKED_TOKEN_PREFIX}log"
+    
+    @staticmethod
+    def heavy_hitters_key(worker_id: str) -> str:
+        """Get cache key for a worker's last heavy hitters window."""
+        return f"{CacheKeys.HEAVY_HITTERS_PREFIX}worker:{worker_id}"
+    
+    @staticmethod
+    def heavy_hitters_log_key() -> str:
+        """Get cache key of the log of workers by last heavy hitters publish."""
+        return f"{CacheKeys.HEAVY_HITTERS_PREFIX}workers"
+    
+    @staticmethod
+    def password_policy_key(scheme: str, target_ms: int) -> str:
+        """Get cache key for a calibrated password hashing cost."""
+        return f"{CacheKeys.PASSWORD_POLICY_PREFIX}{scheme}:{target_ms}"
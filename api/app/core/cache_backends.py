@@ -0,0 +1,710 @@
+"""
+Cache storage backends.
+
+This module defines the storage interface used by the cache layer together
+with a Redis implementation and a fully in-process implementation.
+Note: Redis instance runs on external infrastructure server.
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import msgpack
+import redis.asyncio as redis
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.local_cache import LocalCache
+from app.core.metrics import metrics
+
+# Channel on which invalidated keys are announced to every worker
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Generic cell rate algorithm: the key holds the theoretical arrival time
+# (TAT) of the next request in milliseconds. Each allowed request pushes it
+# cost * window / limit further; a request is denied while that would put it
+# more than a window ahead of now. Uses the Redis clock, so workers with skewed
+# clocks share one view of the window.
+_RATE_LIMIT_SCRIPT = """
+redis.replicate_commands()
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local interval = window / limit
+local increment = interval * cost
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+local allow_at = tat + increment - window
+if allow_at > now then
+    return {0, 0, math.ceil(tat - now), math.ceil(allow_at - now)}
+end
+tat = tat + increment
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now))
+return {1, math.floor((now - tat + window) / interval), math.ceil(tat - now), 0}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of counting a request against a rate limit."""
+    
+    allowed: bool
+    # Requests still allowed right now
+    remaining: int
+    # Seconds until the full limit is available again
+    reset_after: float
+    # Seconds until a denied request would be allowed, 0 if allowed
+    retry_after: float
+
+
+def keyspace_of(key: str) -> str:
+    """Get the keyspace of a cache key, such as "todo" or "rate_limit"."""
+    parts = key.split(":", 2)
+    # Skip the version segment of versioned keys
+    if len(parts) > 1 and parts[0][:1] == "v" and parts[0][1:2].isdigit():
+        return parts[1]
+    return parts[0]
+
+
+def _evicted_from(tier: str) -> Callable[[str], None]:
+    """Build a LocalCache eviction callback counting evictions per keyspace."""
+    def on_evict(key: str) -> None:
+        metrics.inc("cache_evictions_total", keyspace=keyspace_of(key), tier=tier)
+    return on_evict
+
+
+class CacheBackend(ABC):
+    """Storage operations the cache layer needs from a backend.
+    
+    Values are opaque bytes. Backends raise on failure; callers decide
+    whether to fail open.
+    """
+    
+    @abstractmethod
+    async def get(self, key: str) -> Tuple[Optional[bytes], Optional[float]]:
+        """Get a value and, if known, the seconds left before it expires."""
+    
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store a value for ttl seconds."""
+    
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        """Store a value for ttl seconds unless key already holds one.
+        
+        Returns whether the value was stored. Of several concurrent callers
+        across all workers, exactly one stores its value.
+        """
+    
+    @abstractmethod
+    async def pop(self, key: str) -> Optional[bytes]:
+        """Atomically get and delete a value, None if missing.
+        
+        Never served from an in-process tier, so of several concurrent
+        callers exactly one gets the value.
+        """
+    
+    @abstractmethod
+    async def get_counter(self, key: str) -> int:
+        """Get an integer counter, 0 if missing."""
+    
+    @abstractmethod
+    async def get_generation(self, key: str) -> int:
+        """Get a counter only ever advanced through invalidate, 0 if missing."""
+    
+    @abstractmethod
+    async def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        """Atomically increment a counter, resetting its expiry if ttl is given."""
+    
+    @abstractmethod
+    async def add_counts(self, counts: List[Tuple[str, int, int]]) -> List[int]:
+        """Add (key, amount, ttl) increments as one batch and get the new totals.
+        
+        Each counter's expiry is reset to its ttl.
+        """
+    
+    @abstractmethod
+    async def rate_limit(
+        self, key: str, limit: int, window: int, cost: int = 1
+    ) -> RateLimitResult:
+        """Atomically count a request costing cost against limit per window seconds.
+        
+        Denied requests are not counted.
+        """
+    
+    @abstractmethod
+    async def invalidate(
+        self,
+        keys: Iterable[str],
+        counters: Iterable[str],
+        counter_ttl: int,
+        events: Iterable[Tuple[str, bytes]],
+    ) -> None:
+        """Delete keys, advance counters and publish events as one batch."""
+    
+    @abstractmethod
+    async def append_log(self, key: str, entry: str, score: float) -> None:
+        """Add an entry to a log ordered by score, replacing its score if present."""
+    
+    @abstractmethod
+    async def read_log(self, key: str, min_score: float) -> List[Tuple[str, float]]:
+        """Get the log entries scored min_score or higher, in score order."""
+    
+    @abstractmethod
+    async def trim_log(self, key: str, max_score: float) -> None:
+        """Remove the log entries scored max_score or lower."""
+    
+    @property
+    def available(self) -> bool:
+        """Whether the backend is currently expected to serve requests."""
+        return True
+    
+    async def start(self) -> None:
+        """Start any background work the backend needs."""
+    
+    async def close(self) -> None:
+        """Release the backend's resources."""
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-backed storage with an in-process tier in front of it.
+    
+    The in-process tier only serves reads while this worker is subscribed to
+    the invalidation channel, otherwise writes on other workers would go
+    unseen. It is flushed whenever the subscription is (re)established.
+    
+    Every command runs through a circuit breaker with a per-call deadline,
+    so a degraded Redis costs callers milliseconds rather than seconds.
+    """
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.local = LocalCache(
+            settings.CACHE_LOCAL_MAX_ENTRIES,
+            settings.CACHE_LOCAL_TTL_SECONDS,
+            on_evict=_evicted_from("local"),
+        )
+        self.breaker = CircuitBreaker(
+            "redis",
+            probe=self._ping,
+            failure_threshold=settings.REDIS_CIRCUIT_FAILURE_THRESHOLD,
+            min_backoff=settings.REDIS_CIRCUIT_PROBE_MIN_SECONDS,
+            max_backoff=settings.REDIS_CIRCUIT_PROBE_MAX_SECONDS,
+        )
+        self.read_timeout = settings.CACHE_READ_TIMEOUT_MS / 1000
+        self.write_timeout = settings.CACHE_WRITE_TIMEOUT_MS / 1000
+        self._client: Optional[Redis] = None
+        self._rate_limit_script: Optional[AsyncScript] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = False
+    
+    async def client(self) -> Redis:
+        """Get the Redis client, connecting on first use."""
+        if self._client is None:
+            # Responses are left as bytes so cached payloads can use a
+            # binary encoding
+            self._client = await redis.from_url(
+                self.url,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            )
+            # Runs by EVALSHA, falling back to EVAL once per connection
+            self._rate_limit_script = self._client.register_script(_RATE_LIMIT_SCRIPT)
+        return self._client
+    
+    async def _ping(self) -> None:
+        """Check that Redis answers."""
+        client = await self.client()
+        await client.ping()
+    
+    def _local_tier_active(self) -> bool:
+        """Whether the in-process tier may serve reads."""
+        return settings.CACHE_LOCAL_ENABLED and self._subscribed
+    
+    async def _read_through_local(
+        self, key: str, fetch: Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+    ) -> Tuple[Any, Optional[float]]:
+        """Serve key from the in-process tier or fetch it and keep a copy.
+        
+        fetch returns the value and its remaining TTL in seconds. A copy is
+        not kept if an invalidation arrived while it was being fetched.
+        """
+        if self._local_tier_active():
+            value = self.local.get(key)
+            if value is not None:
+                metrics.inc("cache_local_hits_total", keyspace=keyspace_of(key))
+                return value, None
+        
+        epoch = self.local.epoch
+        value, remaining = await fetch()
+        
+        # A local copy must never outlive the Redis entry it was read from
+        if value is not None and self._local_tier_active() and self.local.epoch == epoch:
+            self.local.set(key, value, remaining)
+        
+        return value, remaining
+    
+    async def get(self, key: str) -> Tuple[Optional[bytes], Optional[float]]:
+        """Get a value and the seconds left before it expires."""
+        async def fetch():
+            client = await self.client()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.pttl(key)
+                value, pttl = await pipe.execute()
+            return value, (pttl / 1000 if pttl and pttl > 0 else None)
+        
+        return await self._read_through_local(
+            key, lambda: self.breaker.call(fetch, self.read_timeout)
+        )
+    
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store a value for ttl seconds."""
+        async def store():
+            client = await self.client()
+            await client.setex(key, ttl, value)
+        
+        await self.breaker.call(store, self.write_timeout)
+        
+        if self._local_tier_active():
+            self.local.set(key, value, ttl)
+    
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        """Store a value for ttl seconds unless key already holds one."""
+        async def store():
+            client = await self.client()
+            return bool(await client.set(key, value, ex=ttl, nx=True))
+        
+        return await self.breaker.call(store, self.write_timeout)
+    
+    async def pop(self, key: str) -> Optional[bytes]:
+        """Atomically get and delete a value, None if missing."""
+        async def take():
+            client = await self.client()
+            return await client.getdel(key)
+        
+        self.local.delete(key)
+        return await self.breaker.call(take, self.write_timeout)
+    
+    async def get_counter(self, key: str) -> int:
+        """Get an integer counter, 0 if missing."""
+        async def fetch():
+            client = await self.client()
+            return await client.get(key)
+        
+        value = await self.breaker.call(fetch, self.read_timeout)
+        return int(value) if value is not None else 0
+    
+    async def get_generation(self, key: str) -> int:
+        """Get a generation counter, served from the in-process tier if possible.
+        
+        Generations are safe to keep locally because every change to them
+        is announced on the invalidation channel.
+        """
+        async def fetch():
+            return await self.get_counter(key), None
+        
+        value, _ = await self._read_through_local(key, fetch)
+        return value
+    
+    async def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        """Atomically increment a counter, resetting its expiry if ttl is given."""
+        async def increment():
+            client = await self.client()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.incr(key)
+                if ttl is not None:
+                    pipe.expire(key, ttl)
+                return await pipe.execute()
+        
+        results = await self.breaker.call(increment, self.write_timeout)
+        return results[0]
+    
+    async def add_counts(self, counts: List[Tuple[str, int, int]]) -> List[int]:
+        """Add increments in one pipelined round trip and get the new totals."""
+        async def add():
+            client = await self.client()
+            async with client.pipeline(transaction=False) as pipe:
+                for key, amount, ttl in counts:
+                    pipe.incrby(key, amount)
+                    pipe.expire(key, ttl)
+                return await pipe.execute()
+        
+        results = await self.breaker.call(add, self.write_timeout)
+        return results[::2]
+    
+    async def rate_limit(
+        self, key: str, limit: int, window: int, cost: int = 1
+    ) -> RateLimitResult:
+        """Atomically count a request against a rate limit in one round trip."""
+        async def check():
+            await self.client()
+            return await self._rate_limit_script(
+                keys=[key], args=[limit, window * 1000, cost]
+            )
+        
+        allowed, remaining, reset_ms, retry_ms = await self.breaker.call(check, self.write_timeout)
+        return RateLimitResult(bool(allowed), remaining, reset_ms / 1000, retry_ms / 1000)
+    
+    async def invalidate(
+        self,
+        keys: Iterable[str],
+        counters: Iterable[str],
+        counter_ttl: int,
+        events: Iterable[Tuple[str, bytes]],
+    ) -> None:
+        """Delete keys, advance counters and publish events in one round trip."""
+        keys, counters, events = list(keys), list(counters), list(events)
+        invalidated = keys + counters
+        self.local.delete(*invalidated)
+        
+        async def apply():
+            client = await self.client()
+            async with client.pipeline(transaction=False) as pipe:
+                if keys:
+                    pipe.delete(*keys)
+                for key in counters:
+                    pipe.incr(key)
+                    pipe.expire(key, counter_ttl)
+                if invalidated:
+                    pipe.publish(INVALIDATION_CHANNEL, msgpack.packb(invalidated))
+                for channel, message in events:
+                    pipe.publish(channel, message)
+                await pipe.execute()
+        
+        await self.breaker.call(apply, self.write_timeout)
+    
+    async def append_log(self, key: str, entry: str, score: float) -> None:
+        """Add an entry to a log ordered by score, replacing its score if present."""
+        async def append():
+            client = await self.client()
+            await client.zadd(key, {entry: score})
+        
+        await self.breaker.call(append, self.write_timeout)
+    
+    async def read_log(self, key: str, min_score: float) -> List[Tuple[str, float]]:
+        """Get the log entries scored min_score or higher, in score order."""
+        async def fetch():
+            client = await self.client()
+            return await client.zrangebyscore(key, min_score, "+inf", withscores=True)
+        
+        entries = await self.breaker.call(fetch, self.read_timeout)
+        return [(entry.decode("utf-8"), score) for entry, score in entries]
+    
+    async def trim_log(self, key: str, max_score: float) -> None:
+        """Remove the log entries scored max_score or lower."""
+        async def trim():
+            client = await self.client()
+            await client.zremrangebyscore(key, "-inf", max_score)
+        
+        await self.breaker.call(trim, self.write_timeout)
+    
+    @property
+    def available(self) -> bool:
+        """Whether Redis is reachable, as judged by the circuit breaker."""
+        return not self.breaker.is_open
+    
+    async def start(self) -> None:
+        """Start the listener that keeps the in-process tier coherent."""
+        if not settings.CACHE_LOCAL_ENABLED:
+            return
+        
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+    
+    async def close(self) -> None:
+        """Stop background tasks and close the connection."""
+        await self.breaker.close()
+        
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
+    async def _listen_for_invalidations(self) -> None:
+        """Drop local entries for keys invalidated by any worker."""
+        backoff = 1.0
+        
+        while True:
+            try:
+                client = await self.client()
+            except Exception:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Messages may have been missed while unsubscribed
+                self.local.clear()
+                self._subscribed = True
+                backoff = 1.0
+                
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self.local.delete(*msgpack.unpackb(message["data"], raw=False))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                self._subscribed = False
+                self.local.clear()
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Fully in-process storage for single-node deployments.
+    
+    Entries live in this worker only, so it must not be used with several
+    workers that need to observe each other's invalidations.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.store = LocalCache(max_entries, on_evict=_evicted_from("memory"))
+        self.logs: Dict[str, Dict[str, float]] = {}
+    
+    async def get(self, key: str) -> Tuple[Optional[bytes], Optional[float]]:
+        """Get a value and the seconds left before it expires."""
+        entry = self.store.get_entry(key)
+        if entry is None:
+            return None, None
+        return entry
+    
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store a value for ttl seconds."""
+        self.store.set(key, value, ttl)
+    
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        """Store a value for ttl seconds unless key already holds one."""
+        if self.store.get(key) is not None:
+            return False
+        self.store.set(key, value, ttl)
+        return True
+    
+    async def pop(self, key: str) -> Optional[bytes]:
+        """Get and delete a value, None if missing."""
+        value = self.store.get(key)
+        self.store.delete(key)
+        return value
+    
+    async def get_counter(self, key: str) -> int:
+        """Get an integer counter, 0 if missing."""
+        return self.store.get(key) or 0
+    
+    async def get_generation(self, key: str) -> int:
+        """Get a generation counter, 0 if missing."""
+        return self.store.get(key) or 0
+    
+    async def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        """Increment a counter, resetting its expiry if ttl is given."""
+        return self.store.incr(key, ttl)
+    
+    async def add_counts(self, counts: List[Tuple[str, int, int]]) -> List[int]:
+        """Add increments and get the new totals."""
+        return [self.store.incr(key, ttl, amount) for key, amount, ttl in counts]
+    
+    async def rate_limit(
+        self, key: str, limit: int, window: int, cost: int = 1
+    ) -> RateLimitResult:
+        """Count a request against a rate limit, like the Redis script."""
+        now = time.time()
+        interval = window / limit
+        tat = max(self.store.get(key) or now, now)
+        
+        allow_at = tat + interval * cost - window
+        if allow_at > now:
+            return RateLimitResult(False, 0, tat - now, allow_at - now)
+        
+        tat += interval * cost
+        self.store.set(key, tat, tat - now)
+        return RateLimitResult(True, int((now - tat + window) // interval), tat - now, 0)
+    
+    async def invalidate(
+        self,
+        keys: Iterable[str],
+        counters: Iterable[str],
+        counter_ttl: int,
+        events: Iterable[Tuple[str, bytes]],
+    ) -> None:
+        """Delete keys and advance counters.
+        
+        Events are dropped, as there are no other workers to notify.
+        """
+        self.store.delete(*keys)
+        for key in counters:
+            self.store.incr(key, counter_ttl)
+    
+    async def append_log(self, key: str, entry: str, score: float) -> None:
+        """Add an entry to a log ordered by score, replacing its score if present."""
+        self.logs.setdefault(key, {})[entry] = score
+    
+    async def read_log(self, key: str, min_score: float) -> List[Tuple[str, float]]:
+        """Get the log entries scored min_score or higher, in score order."""
+        entries = self.logs.get(key, {}).items()
+        return sorted(
+            ((entry, score) for entry, score in entries if score >= min_score),
+            key=lambda item: item[1],
+        )
+    
+    async def trim_log(self, key: str, max_score: float) -> None:
+        """Remove the log entries scored max_score or lower."""
+        log = self.logs.get(key, {})
+        for entry in [entry for entry, score in log.items() if score <= max_score]:
+            del log[entry]
+
+
+class InstrumentedCacheBackend(CacheBackend):
+    """Backend wrapper recording per-keyspace cache metrics.
+    
+    Records operation latency, errors, and for reads hits, misses and bytes
+    served, labelled with the keyspace of the key involved.
+    """
+    
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+    
+    async def _timed(self, operation: str, keyspace: str, call: Awaitable[Any]) -> Any:
+        """Await call, recording its latency or failure."""
+        started = time.perf_counter()
+        try:
+            return await call
+        except Exception:
+            metrics.inc("cache_errors_total", keyspace=keyspace, operation=operation)
+            raise
+        finally:
+            metrics.observe(
+                "cache_operation_seconds",
+                time.perf_counter() - started,
+                keyspace=keyspace,
+                operation=operation,
+            )
+    
+    async def get(self, key: str) -> Tuple[Optional[bytes], Optional[float]]:
+        """Get a value, counting the hit or miss."""
+        keyspace = keyspace_of(key)
+        value, remaining = await self._timed("get", keyspace, self.backend.get(key))
+        
+        if value is None:
+            metrics.inc("cache_misses_total", keyspace=keyspace)
+        else:
+            metrics.inc("cache_hits_total", keyspace=keyspace)
+            metrics.inc("cache_bytes_served_total", len(value), keyspace=keyspace)
+        
+        return value, remaining
+    
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store a value for ttl seconds."""
+        await self._timed("set", keyspace_of(key), self.backend.set(key, value, ttl))
+    
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        """Store a value for ttl seconds unless key already holds one."""
+        return await self._timed("add", keyspace_of(key), self.backend.add(key, value, ttl))
+    
+    async def pop(self, key: str) -> Optional[bytes]:
+        """Atomically get and delete a value."""
+        return await self._timed("pop", keyspace_of(key), self.backend.pop(key))
+    
+    async def get_counter(self, key: str) -> int:
+        """Get an integer counter, 0 if missing."""
+        return await self._timed("get_counter", keyspace_of(key), self.backend.get_counter(key))
+    
+    async def get_generation(self, key: str) -> int:
+        """Get a generation counter, 0 if missing."""
+        return await self._timed(
+            "get_generation", keyspace_of(key), self.backend.get_generation(key)
+        )
+    
+    async def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        """Atomically increment a counter."""
+        return await self._timed("incr", keyspace_of(key), self.backend.incr(key, ttl))
+    
+    async def add_counts(self, counts: List[Tuple[str, int, int]]) -> List[int]:
+        """Add increments as one batch."""
+        return await self._timed("add_counts", "batch", self.backend.add_counts(counts))
+    
+    async def rate_limit(
+        self, key: str, limit: int, window: int, cost: int = 1
+    ) -> RateLimitResult:
+        """Count a request against a rate limit."""
+        return await self._timed(
+            "rate_limit", keyspace_of(key), self.backend.rate_limit(key, limit, window, cost)
+        )
+    
+    async def invalidate(
+        self,
+        keys: Iterable[str],
+        counters: Iterable[str],
+        counter_ttl: int,
+        events: Iterable[Tuple[str, bytes]],
+    ) -> None:
+        """Apply an invalidation batch, counting invalidations per keyspace."""
+        keys, counters = list(keys), list(counters)
+        for key in keys + counters:
+            metrics.inc("cache_invalidations_total", keyspace=keyspace_of(key))
+        
+        await self._timed(
+            "invalidate", "batch", self.backend.invalidate(keys, counters, counter_ttl, events)
+        )
+    
+    async def append_log(self, key: str, entry: str, score: float) -> None:
+        """Add an entry to a log."""
+        await self._timed(
+            "append_log", keyspace_of(key), self.backend.append_log(key, entry, score)
+        )
+    
+    async def read_log(self, key: str, min_score: float) -> List[Tuple[str, float]]:
+        """Get the log entries scored min_score or higher."""
+        return await self._timed(
+            "read_log", keyspace_of(key), self.backend.read_log(key, min_score)
+        )
+    
+    async def trim_log(self, key: str, max_score: float) -> None:
+        """Remove the log entries scored max_score or lower."""
+        await self._timed("trim_log", keyspace_of(key), self.backend.trim_log(key, max_score))
+    
+    @property
+    def available(self) -> bool:
+        """Whether the wrapped backend is available."""
+        return self.backend.available
+    
+    async def start(self) -> None:
+        """Start the wrapped backend."""
+        await self.backend.start()
+    
+    async def close(self) -> None:
+        """Close the wrapped backend."""
+        await self.backend.close()
+
+
+def create_cache_backend() -> Optional[CacheBackend]:
+    """Create the backend selected by CACHE_BACKEND, or None if disabled."""
+    if settings.CACHE_BACKEND == "memory":
+        return InstrumentedCacheBackend(MemoryCacheBackend(settings.CACHE_MEMORY_MAX_ENTRIES))
+    
+    if settings.CACHE_BACKEND == "redis" and settings.REDIS_ENABLED:
+        return InstrumentedCacheBackend(RedisCacheBackend(settings.REDIS_URL))
+    
+    return None
@@ -4,7 +4,7 @@ Database configuration and session management.
 This module handles database connection, session management, and migrations.
 """
 
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
@@ -35,6 +35,25 @@ AsyncSessionLocal = async_sessionmaker(
 
 Base = declarative_base()
 
+# Session.info key holding hooks to run after a successful commit
+_AFTER_COMMIT_HOOKS = "after_commit_hooks"
+
+
+def after_commit(session: AsyncSession, hook: Callable[[], Awaitable[None]]) -> None:
+    """Run hook once the session's transaction commits; dropped on rollback."""
+    session.info.setdefault(_AFTER_COMMIT_HOOKS, []).append(hook)
+
+
+async def _run_after_commit_hooks(session: AsyncSession) -> None:
+    """Run and clear the session's after-commit hooks."""
+    for hook in session.info.pop(_AFTER_COMMIT_HOOKS, []):
+        try:
+            await hook()
+        except Exception:
+            # The transaction is already committed; a failing hook must not
+            # turn the request into an error
+            pass
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Get database session."""
@@ -43,8 +62,11 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
             await session.commit()
         except Exception:
+            session.info.pop(_AFTER_COMMIT_HOOKS, None)
             await session.rollback()
             raise
+        else:
+            await _run_after_commit_hooks(session)
         finally:
             await session.close()
 
@@ -0,0 +1,223 @@
+"""
+In-process rate limiting.
+
+This module provides two limiters that decide without waiting on the
+network.
+
+The batched limiter counts requests against fixed-window limits in
+process and syncs the counts with the cache backend in batches. Every
+sync adds this worker's new hits to the shared counters and pulls back
+the global totals. Between syncs a worker only sees its own new hits, so
+across all workers a limit can be overshot by roughly what they admit in
+one sync interval. It counts a bounded number of identifiers; requests
+from others are left to an exact check on the backend.
+
+The fallback limiter enforces each worker's share of a limit on its own,
+for when the cache backend cannot be reached.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+
+from app.core.cache import CacheKeys, get_cache
+from app.core.cache_backends import RateLimitResult
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class _WindowCounter:
+    """Hits counted against one identifier and action in one window."""
+    
+    __slots__ = ("identifier", "action", "window", "window_id", "synced", "pending")
+    
+    def __init__(self, identifier: str, action: str, window: int, window_id: int):
+        self.identifier = identifier
+        self.action = action
+        self.window = window
+        self.window_id = window_id
+        # Global total as of the last sync, including this worker's hits
+        self.synced = 0
+        # Hits on this worker not yet synced
+        self.pending = 0
+
+
+class BatchedRateLimiter:
+    """Fixed-window rate limiter with batched, periodic backend syncs.
+    
+    Keeps at most max_counters counters. When full, a new one replaces the
+    least recently used counter if that has no hits left to sync; if it
+    has, the request is not counted here.
+    """
+    
+    def __init__(self, max_counters: int):
+        self.max_counters = max_counters
+        self._counters: "OrderedDict[Tuple[str, str, int], _WindowCounter]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+    
+    def hit(
+        self, identifier: str, action: str, limit: int, window: int, cost: int = 1
+    ) -> Optional[RateLimitResult]:
+        """Count a request costing cost against limit per window seconds.
+        
+        Denied requests are not counted. Returns None if there is no room
+        to count the request, which must then be checked exactly.
+        """
+        now = time.time()
+        window_id = int(now // window)
+        reset_after = (window_id + 1) * window - now
+        
+        key = (identifier, action, window_id)
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.max_counters:
+                # Evicting a counter with pending hits would lose them
+                oldest = next(iter(self._counters.values()))
+                if oldest.pending:
+                    metrics.inc("rate_limit_local_overflow_total", action=action)
+                    return None
+                self._counters.popitem(last=False)
+            counter = _WindowCounter(identifier, action, window, window_id)
+            self._counters[key] = counter
+        else:
+            self._counters.move_to_end(key)
+        
+        used = counter.synced + counter.pending
+        if used + cost > limit:
+            return RateLimitResult(False, max(0, limit - used), reset_after, reset_after)
+        
+        counter.pending += cost
+        return RateLimitResult(True, limit - used - cost, reset_after, 0)
+    
+    async def sync(self) -> None:
+        """Push pending hits to the backend and pull back the global totals."""
+        backend = get_cache()
+        if backend is None:
+            return
+        
+        now = time.time()
+        batch: List[Tuple[_WindowCounter, int]] = []
+        for key, counter in list(self._counters.items()):
+            if counter.pending:
+                batch.append((counter, counter.pending))
+                # Hits arriving during the round trip are counted afresh
+                counter.pending = 0
+            elif (counter.window_id + 1) * counter.window <= now:
+                # Nothing left to sync for a window that has ended
+                del self._counters[key]
+        
+        if not batch:
+            return
+        
+        counts = [
+            (
+                CacheKeys.rate_limit_window_key(
+                    counter.identifier, counter.action, counter.window_id
+                ),
+                sent,
+                counter.window * 2,
+            )
+            for counter, sent in batch
+        ]
+        
+        try:
+            totals = await backend.add_counts(counts)
+        except Exception:
+            # Keep the hits and retry with the next sync, unless their
+            # window has ended and they no longer matter
+            for counter, sent in batch:
+                if (counter.window_id + 1) * counter.window > now:
+                    counter.pending += sent
+            raise
+        
+        for (counter, _), total in zip(batch, totals):
+            counter.synced = max(counter.synced, total)
+        
+        metrics.inc("rate_limit_synced_hits_total", sum(sent for _, sent in batch))
+        metrics.set_gauge("rate_limit_local_counters", len(self._counters))
+    
+    async def _sync_forever(self) -> None:
+        """Sync on an interval until cancelled."""
+        while True:
+            await asyncio.sleep(settings.RATE_LIMIT_SYNC_INTERVAL_MS / 1000)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                metrics.inc("rate_limit_sync_errors_total")
+    
+    async def start(self) -> None:
+        """Start syncing with the backend."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_forever())
+    
+    async def close(self) -> None:
+        """Stop syncing, pushing any pending hits first."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        try:
+            await self.sync()
+        except Exception:
+            pass
+
+
+class FallbackRateLimiter:
+    """Sliding-window log limiter enforcing one worker's share of each limit.
+    
+    Keeps the times of the requests allowed in the last window per key,
+    one per unit of cost and at most one limit's worth, and evicts the least recently seen keys
+    beyond max_keys, so memory stays bounded under many identifiers.
+    """
+    
+    def __init__(self, max_keys: int, workers: int):
+        self.max_keys = max_keys
+        self.workers = max(1, workers)
+        self._logs: "OrderedDict[str, Deque[float]]" = OrderedDict()
+    
+    def hit(self, key: str, limit: int, window: int, cost: int = 1) -> RateLimitResult:
+        """Count a request costing cost against this worker's share of limit.
+        
+        Denied requests are not counted.
+        """
+        limit = max(cost, math.ceil(limit / self.workers))
+        now = time.monotonic()
+        
+        log = self._logs.get(key)
+        if log is None:
+            log = deque()
+            self._logs[key] = log
+            while len(self._logs) > self.max_keys:
+                self._logs.popitem(last=False)
+        else:
+            self._logs.move_to_end(key)
+        
+        while log and log[0] <= now - window:
+            log.popleft()
+        
+        if len(log) + cost > limit:
+            # Wait until enough of the oldest requests leave the window
+            freed_at = log[len(log) + cost - limit - 1]
+            return RateLimitResult(
+                False, max(0, limit - len(log)), log[-1] + window - now, freed_at + window - now
+            )
+        
+        log.extend([now] * cost)
+        return RateLimitResult(True, limit - len(log), float(window), 0)
+    
+    def __len__(self) -> int:
+        return len(self._logs)
+
+
+batched_limiter = BatchedRateLimiter(settings.RATE_LIMIT_LOCAL_MAX_COUNTERS)
+fallback_limiter = FallbackRateLimiter(
+    settings.RATE_LIMIT_FALLBACK_MAX_IDENTIFIERS, settings.RATE_LIMIT_WORKER_COUNT
+)
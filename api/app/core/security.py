@@ -1,30 +1,245 @@
 """
 Security utilities for password hashing and JWT token management.
 
-This module provides secure password hashing using bcrypt and JWT token
-generation and validation.
+This module provides secure password hashing using bcrypt or argon2 and
+JWT token generation and validation.
+
+The hashing cost is either configured or calibrated against a target
+latency on the hardware we run on. Hashes made under a different scheme
+or cost are reported as needing an update so they can be rehashed at
+the next successful login.
+
+Password hashing is CPU bound and deliberately slow, so it runs on a
+dedicated, bounded thread pool instead of the event loop, behind an
+admission controller that sheds work once the pool is saturated.
 """
 
+import asyncio
+import hashlib
+import math
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple, TypeVar
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from app.core.cache import CacheKeys, cache_add, cache_get, cache_set
 from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.local_cache import LocalCache
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+# Cost bounds searched by calibration: bcrypt log2 rounds, argon2 iterations
+_COST_RANGES = {"bcrypt": (10, 16), "argon2": (2, 12)}
+
+# How long a calibrated cost is shared with other workers
+_POLICY_TTL_SECONDS = 86400
+
+_CALIBRATION_PASSWORD = "calibration-password-0123456789"
+
+
+def _configured_cost(scheme: str) -> int:
+    """Get the hashing cost set in configuration for a scheme."""
+    return settings.BCRYPT_ROUNDS if scheme == "bcrypt" else settings.ARGON2_TIME_COST
+
+
+def _build_context(scheme: str, cost: int) -> CryptContext:
+    """Build a hashing context that hashes with scheme at exactly cost.
+    
+    The other scheme stays verifiable but deprecated, and min and max
+    rounds are pinned to cost, so needs_update flags any hash made under
+    a different scheme or a higher or lower cost.
+    """
+    schemes = [scheme] + [other for other in _COST_RANGES if other != scheme]
+    return CryptContext(
+        schemes=schemes,
+        default=scheme,
+        deprecated="auto",
+        **{
+            f"{scheme}__rounds": cost,
+            f"{scheme}__min_rounds": cost,
+            f"{scheme}__max_rounds": cost,
+        },
+        **({"argon2__memory_cost": settings.ARGON2_MEMORY_COST_KIB} if scheme == "argon2" else {}),
+    )
+
+
+def configure_password_hashing(scheme: str, cost: int) -> None:
+    """Switch the hashing policy to scheme at cost."""
+    global pwd_context
+    pwd_context = _build_context(scheme, cost)
+    metrics.set_gauge("password_hash_cost", cost, scheme=scheme)
+
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+pwd_context = _build_context(
+    settings.PASSWORD_HASH_SCHEME, _configured_cost(settings.PASSWORD_HASH_SCHEME)
+)
 
+# bcrypt releases the GIL while hashing, so threads give real parallelism
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    return pwd_context.hash(password)
+# One slot per pool thread; callers queue for a slot, not inside the pool
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+_hashes_running = 0
+_hashes_waiting = 0
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def _run_hashing(operation: str, func: Callable[..., T], *args: Any) -> T:
+    """Run a hashing function on the hashing pool and record its metrics."""
+    global _hashes_running
+    
+    await _admit_hash(operation)
+    
+    _hashes_running += 1
+    _record_hash_queue()
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hashes_running -= 1
+        _hash_slots.release()
+        _record_hash_queue()
+        metrics.observe(
+            "password_hash_seconds", time.perf_counter() - started, operation=operation
+        )
+
+
+async def _admit_hash(operation: str) -> None:
+    """Wait for a hashing slot, shedding the request if the wait is too long.
+    
+    Raises ServiceUnavailableException when the queue is full or no slot
+    frees up within PASSWORD_HASH_MAX_QUEUE_WAIT_MS, so a login storm fails
+    fast instead of queueing unbounded CPU work.
+    """
+    global _hashes_waiting
+    
+    max_wait = settings.PASSWORD_HASH_MAX_QUEUE_WAIT_MS / 1000
+    
+    if _hashes_waiting >= settings.PASSWORD_HASH_MAX_QUEUE:
+        _reject_hash(operation, "queue_full", max_wait)
+    
+    _hashes_waiting += 1
+    _record_hash_queue()
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), max_wait)
+    except asyncio.TimeoutError:
+        _reject_hash(operation, "timeout", max_wait)
+    finally:
+        _hashes_waiting -= 1
+        _record_hash_queue()
+        metrics.observe(
+            "password_hash_queue_seconds", time.perf_counter() - started, operation=operation
+        )
+
+
+def _reject_hash(operation: str, reason: str, retry_after: float) -> None:
+    """Count a shed hashing request and fail it with 503."""
+    metrics.inc("password_hash_rejections_total", operation=operation, reason=reason)
+    raise ServiceUnavailableException(
+        "Authentication is temporarily overloaded, please retry",
+        details={"retry_after": max(1, math.ceil(retry_after))},
+    )
+
+
+def _record_hash_queue() -> None:
+    """Publish how many hashes are running and waiting for a slot."""
+    metrics.set_gauge("password_hash_in_flight", _hashes_running)
+    metrics.set_gauge("password_hash_queue_depth", _hashes_waiting)
+
+
+def _measure_cost(scheme: str, target_seconds: float) -> int:
+    """Find the highest cost whose hash time stays within target_seconds.
+    
+    Never returns less than the lower bound of the scheme's cost range,
+    so a slow host cannot calibrate itself into weak hashes.
+    """
+    low, high = _COST_RANGES[scheme]
+    best = low
+    for cost in range(low, high + 1):
+        context = _build_context(scheme, cost)
+        started = time.perf_counter()
+        context.hash(_CALIBRATION_PASSWORD)
+        if time.perf_counter() - started > target_seconds:
+            break
+        best = cost
+    return best
+
+
+async def calibrate_password_hashing(force: bool = False) -> int:
+    """Calibrate the hashing cost to PASSWORD_HASH_TARGET_MS and apply it.
+    
+    The first worker to calibrate shares its result through the cache so
+    that every worker hashes at the same cost; otherwise workers that
+    measured slightly differently would keep rehashing each other's
+    hashes. Workers calibrating concurrently on a cold start all adopt
+    whichever result was stored first. force measures again and replaces
+    the shared result.
+    
+    Returns the cost now in use.
+    """
+    scheme = settings.PASSWORD_HASH_SCHEME
+    target_ms = settings.PASSWORD_HASH_TARGET_MS
+    if target_ms <= 0:
+        cost = _configured_cost(scheme)
+        configure_password_hashing(scheme, cost)
+        return cost
+    
+    key = CacheKeys.password_policy_key(scheme, target_ms)
+    cost = None if force else await cache_get(key)
+    if not isinstance(cost, int):
+        measured = await asyncio.get_running_loop().run_in_executor(
+            _hash_executor, _measure_cost, scheme, target_ms / 1000
+        )
+        if force:
+            await cache_set(key, measured, _POLICY_TTL_SECONDS)
+            cost = measured
+        elif await cache_add(key, measured, _POLICY_TTL_SECONDS):
+            cost = measured
+        else:
+            # Another worker stored its result first
+            shared = await cache_get(key)
+            cost = shared if isinstance(shared, int) else measured
+    
+    configure_password_hashing(scheme, cost)
+    return cost
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password under the current policy."""
+    return await _run_hashing("hash", pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run_hashing("verify", pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password and rehash it if the hash is outside the current policy.
+    
+    Returns whether the password matched and, if the stored hash needs an
+    update, a replacement hash to store.
+    """
+    return await _run_hashing(
+        "verify", pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+def shutdown_password_hashing() -> None:
+    """Stop the password hashing pool."""
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -39,6 +254,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         )
     
     to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
+    # Unique ID through which the token can be revoked
+    to_encode.setdefault("jti", secrets.token_urlsafe(16))
     
     encoded_jwt = jwt.encode(
         to_encode,
@@ -49,15 +266,38 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_refresh_token() -> str:
+    """Create an opaque, random refresh token."""
+    return secrets.token_urlsafe(32)
+
+
+# Payloads of recently verified tokens by token digest, each kept until the
+# token expires, so hot clients skip signature checks
+_verified_tokens = LocalCache(max_entries=settings.JWT_VERIFIED_CACHE_MAX_ENTRIES)
+
+
 def decode_access_token(token: str) -> dict:
     """Decode and validate a JWT token."""
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    payload = _verified_tokens.get(digest)
+    if payload is not None:
+        metrics.inc("jwt_verifications_total", result="cached")
+        return dict(payload)
+    
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM],
         )
-        return payload
     except JWTError:
+        metrics.inc("jwt_verifications_total", result="invalid")
         raise ValueError("Invalid token")
+    
+    metrics.inc("jwt_verifications_total", result="verified")
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        _verified_tokens.set(digest, payload, ttl=expires_at - time.time())
+    
+    return dict(payload)
 
@@ -5,46 +5,50 @@ This module provides FastAPI dependencies for authentication and
 getting the current user from JWT tokens.
 """
 
-from typing import Annotated, Optional
-
-from fastapi import Depends, Header
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_context import get_auth_context
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.exceptions import UnauthorizedException
-from app.core.security import decode_access_token
+from app.core.exceptions import ForbiddenException, UnauthorizedException
+from app.core.revocation import revocations
 from app.models import User
-from app.repositories.user_repository import UserRepository
+from app.services.user_service import UserService
 
 
 async def get_current_user(
-    authorization: Annotated[Optional[str], Header()] = None,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ) -> User:
     """Get current authenticated user from JWT token."""
-    if not authorization:
-        raise UnauthorizedException("Authorization header required")
+    # Reuses the verification done by the rate limiter for this request
+    context = get_auth_context(request.scope)
+    if context.error is not None:
+        raise UnauthorizedException(context.error)
     
-    try:
-        scheme, token = authorization.split(" ", 1)
-        if scheme.lower() != "bearer":
-            raise UnauthorizedException("Invalid authorization scheme")
-    except ValueError:
-        raise UnauthorizedException("Invalid authorization header format")
+    # Answered in-process unless the token might have been revoked
+    if await revocations.is_revoked(context.payload.get("jti")):
+        raise UnauthorizedException("Token has been revoked")
     
-    try:
-        payload = decode_access_token(token)
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise UnauthorizedException("Invalid token payload")
-    except ValueError:
-        raise UnauthorizedException("Invalid or expired token")
+    user_id: int = context.user_id
     
-    user_repo = UserRepository(db)
-    user = await user_repo.get_by_id(user_id)
+    # Served from the principal cache, so most requests need no query here
+    user = await UserService(db).get_principal(user_id)
     
     if user is None:
         raise UnauthorizedException("User not found")
     
     return user
 
+
+async def get_current_admin(
+    current_user: User = Depends(get_current_user),
+) -> User:
+    """Get current authenticated user, who must be an administrator."""
+    # Emails are compared without case, as accounts are looked up
+    admin_emails = {email.lower() for email in settings.ADMIN_EMAILS}
+    if current_user.email.lower() not in admin_emails:
+        raise ForbiddenException("Administrator access required")
+    
+    return current_user
@@ -4,7 +4,7 @@ Application routers module.
 This module exports all routers for inclusion in the main application.
 """
 
-from app.routers import auth, todos
+from app.routers import admin, auth, todos
 
-__all__ = ["auth", "todos"]
+__all__ = ["admin", "auth", "todos"]
 
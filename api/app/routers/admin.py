@@ -0,0 +1,30 @@
+"""
+Admin router.
+
+This module handles operational endpoints for administrators.
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, Query, status
+
+from app.core.heavy_hitters import heavy_hitters
+from app.dependencies import get_current_admin
+from app.models import User
+
+router = APIRouter()
+
+
+@router.get(
+    "/heavy-hitters",
+    status_code=status.HTTP_200_OK,
+    summary="Get heavy hitters",
+    description="Get the users and client IPs that sent the most requests "
+    "in the last complete window, merged across workers",
+)
+async def get_heavy_hitters(
+    limit: int = Query(default=20, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin),
+) -> Dict[str, Any]:
+    """Get the heaviest users and client IPs."""
+    return await heavy_hitters.collect(limit)
@@ -2,20 +2,59 @@
 Authentication router.
 
 This module handles authentication-related endpoints including
-user registration and login.
+user registration, login and token refresh.
 """
 
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Cookie, Depends, Request, Response, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_context import get_auth_context
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.exceptions import ConflictException, UnauthorizedException
+from app.core.rate_limit_policy import RateLimitPolicy, rate_limit_policy
+from app.dependencies import get_current_user
+from app.models import User
 from app.schemas import LoginRequest, LoginResponse, RegisterRequest, UserResponse
 from app.services.auth_service import AuthService
 
 router = APIRouter()
 
+# Credential endpoints are counted exactly, in their own small budgets
+LOGIN_POLICY = RateLimitPolicy(
+    "login",
+    limit=settings.RATE_LIMIT_LOGIN_ATTEMPTS,
+    window=settings.RATE_LIMIT_LOGIN_WINDOW_MINUTES * 60,
+)
+REGISTER_POLICY = RateLimitPolicy(
+    "register",
+    limit=settings.RATE_LIMIT_REGISTRATION_ATTEMPTS,
+    window=settings.RATE_LIMIT_REGISTRATION_WINDOW_HOURS * 3600,
+)
+
+# Refresh tokens travel in an HttpOnly cookie sent only to the auth routes
+REFRESH_TOKEN_COOKIE = "refresh_token"
+REFRESH_TOKEN_COOKIE_PATH = "/api/v1/auth"
+
+
+def _set_refresh_cookie(response: Response, refresh_token: Optional[str]) -> None:
+    """Hand a refresh token to the client, if one was issued."""
+    if refresh_token is None:
+        return
+    
+    response.set_cookie(
+        REFRESH_TOKEN_COOKIE,
+        refresh_token,
+        max_age=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+        path=REFRESH_TOKEN_COOKIE_PATH,
+        secure=not settings.DEBUG,
+        httponly=True,
+        samesite="strict",
+    )
+
 
 @router.post(
     "/register",
@@ -24,6 +63,7 @@ router = APIRouter()
     summary="Register a new user",
     description="Create a new user account with email and password",
 )
+@rate_limit_policy(REGISTER_POLICY)
 async def register(
     request: RegisterRequest,
     db: AsyncSession = Depends(get_db),
@@ -44,15 +84,58 @@ async def register(
     summary="User login",
     description="Authenticate user and receive access token",
 )
+@rate_limit_policy(LOGIN_POLICY)
 async def login(
     request: LoginRequest,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ) -> LoginResponse:
     """Authenticate user and return access token."""
     auth_service = AuthService(db)
     try:
-        response = await auth_service.login(request.email, request.password)
-        return response
+        login_response, refresh_token = await auth_service.login(request.email, request.password)
+        _set_refresh_cookie(response, refresh_token)
+        return login_response
+    except UnauthorizedException:
+        raise
+
+
+@router.post(
+    "/refresh",
+    response_model=LoginResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Refresh access token",
+    description="Exchange the refresh token cookie for a new access token",
+)
+async def refresh(
+    response: Response,
+    refresh_token: Optional[str] = Cookie(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> LoginResponse:
+    """Rotate the refresh token and return a new access token."""
+    auth_service = AuthService(db)
+    try:
+        login_response, new_refresh_token = await auth_service.refresh(refresh_token)
+        _set_refresh_cookie(response, new_refresh_token)
+        return login_response
     except UnauthorizedException:
         raise
 
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="User logout",
+    description="Revoke the access token and the refresh token cookie",
+)
+async def logout(
+    request: Request,
+    response: Response,
+    refresh_token: Optional[str] = Cookie(default=None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> None:
+    """Revoke the current tokens."""
+    auth_service = AuthService(db)
+    await auth_service.logout(get_auth_context(request.scope).payload, refresh_token)
+    response.delete_cookie(REFRESH_TOKEN_COOKIE, path=REFRESH_TOKEN_COOKIE_PATH)
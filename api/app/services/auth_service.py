@@ -6,14 +6,35 @@ including user registration, login, and token management.
 """
 
 from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import (
+    MISSING,
+    CacheKeys,
+    cache_get,
+    cache_pop,
+    cache_set,
+    cache_set_missing,
+    get_cache,
+    pending_invalidations,
+)
 from app.core.config import settings
+from app.core.database import after_commit
 from app.core.exceptions import ConflictException, UnauthorizedException
-from app.core.security import create_access_token, hash_password, verify_password
+from app.core.revocation import revocations
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    hash_password,
+    verify_and_update_password,
+)
+from app.models import User
 from app.repositories.user_repository import UserRepository
 from app.schemas import LoginResponse, RegisterRequest, UserResponse
+from app.services.todo_service import schedule_cache_warmup
+from app.services.user_service import UserService, cache_principal
 
 
 class AuthService:
@@ -25,41 +46,119 @@ class AuthService:
     
     async def register(self, request: RegisterRequest) -> UserResponse:
         """Register a new user."""
-        # Check if user already exists
+        # Registered emails are rejected before the password is hashed,
+        # from the cache when it knows the email, else by an index probe
+        known_email_key = CacheKeys.known_email_key(request.email)
+        known_email_ttl = settings.CACHE_KNOWN_EMAIL_TTL_SECONDS
+        if await cache_get(known_email_key) is not None:
+            raise ConflictException("User with this email already exists")
+        
         if await self.user_repo.exists_by_email(request.email):
+            await cache_set(known_email_key, True, known_email_ttl)
             raise ConflictException("User with this email already exists")
         
         # Hash password
-        password_hash = hash_password(request.password)
+        password_hash = await hash_password(request.password)
+        
+        # Create user; the insert itself detects duplicates, race free
+        user = await self.user_repo.create_if_absent(request.email, password_hash)
+        
+        if user is None:
+            await cache_set(known_email_key, True, known_email_ttl)
+            raise ConflictException("User with this email already exists")
         
-        # Create user
-        user = await self.user_repo.create(request.email, password_hash)
+        # Once the user is committed, the email is known rather than unknown
+        after_commit(self.db, lambda: cache_set(known_email_key, True, known_email_ttl))
+        pending_invalidations(self.db).delete(CacheKeys.unknown_email_key(request.email))
         
         return UserResponse.model_validate(user)
     
-    async def login(self, email: str, password: str) -> LoginResponse:
-        """Authenticate user and return access token."""
+    async def login(self, email: str, password: str) -> Tuple[LoginResponse, Optional[str]]:
+        """Authenticate user and return access and refresh tokens."""
+        # Emails recently found to have no account skip the database
+        unknown_email_key = CacheKeys.unknown_email_key(email)
+        if await cache_get(unknown_email_key) is MISSING:
+            raise UnauthorizedException("Invalid email or password")
+        
         # Get user by email
         user = await self.user_repo.get_by_email(email)
         
         if user is None:
+            await cache_set_missing(unknown_email_key, settings.CACHE_NEGATIVE_TTL_SECONDS)
             # Use generic message to prevent user enumeration
             raise UnauthorizedException("Invalid email or password")
         
         # Verify password
-        if not verify_password(password, user.password_hash):
+        valid, new_hash = await verify_and_update_password(password, user.password_hash)
+        if not valid:
             raise UnauthorizedException("Invalid email or password")
         
+        # Move hashes made under an older scheme or cost to the current policy
+        if new_hash is not None:
+            await self.user_repo.update_password_hash(user, new_hash)
+            UserService(self.db).invalidate_principal(user.id)
+        elif settings.CACHE_WARM_ON_LOGIN:
+            # The token is about to be used, so resolving it should not
+            # need a query
+            await cache_principal(user)
+        
+        # The client fetches its todo list right after logging in
+        schedule_cache_warmup(user.id)
+        
+        return await self._issue_tokens(user)
+    
+    async def refresh(self, refresh_token: Optional[str]) -> Tuple[LoginResponse, Optional[str]]:
+        """Exchange a refresh token for new access and refresh tokens.
+        
+        Costs one cache lookup instead of a password hash. Refresh tokens
+        rotate: each is consumed atomically on use, so a replayed token is
+        rejected even if two requests race with it.
+        """
+        if not refresh_token:
+            raise UnauthorizedException("Refresh token required")
+        
+        record = await cache_pop(CacheKeys.refresh_token_key(refresh_token))
+        if record is None:
+            raise UnauthorizedException("Invalid or expired refresh token")
+        
+        user = await UserService(self.db).get_principal(record["user_id"])
+        if user is None:
+            raise UnauthorizedException("Invalid or expired refresh token")
+        
+        return await self._issue_tokens(user)
+    
+    async def logout(self, token_payload: Dict[str, Any], refresh_token: Optional[str]) -> None:
+        """Revoke the access token and discard the refresh token."""
+        token_id = token_payload.get("jti")
+        if token_id is not None:
+            await revocations.revoke(token_id, token_payload["exp"])
+        
+        if refresh_token:
+            await cache_pop(CacheKeys.refresh_token_key(refresh_token))
+    
+    async def _issue_tokens(self, user: User) -> Tuple[LoginResponse, Optional[str]]:
+        """Create an access token and, if tokens can be stored, a refresh token."""
         # Create access token
         access_token_expires = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.id, "email": user.email},
+            data={"sub": str(user.id), "email": user.email},
             expires_delta=access_token_expires,
         )
         
-        return LoginResponse(
+        # Refresh tokens live in the cache backend; without one, clients
+        # log in again once the access token expires
+        refresh_token = None
+        if get_cache() is not None:
+            refresh_token = create_refresh_token()
+            await cache_set(
+                CacheKeys.refresh_token_key(refresh_token),
+                {"user_id": user.id},
+                settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+            )
+        
+        response = LoginResponse(
             access_token=access_token,
             token_type="bearer",
             user=UserResponse.model_validate(user),
         )
-
+        return response, refresh_token
@@ -0,0 +1,54 @@
+"""
+Tests for the request-scoped authentication context.
+"""
+
+from app.core.auth_context import get_auth_context
+from app.core.metrics import metrics
+from app.core.security import create_access_token
+
+
+def _scope(authorization=None):
+    """An HTTP scope carrying an optional Authorization header."""
+    headers = [] if authorization is None else [(b"authorization", authorization.encode())]
+    return {"type": "http", "headers": headers}
+
+
+def test_token_round_trip():
+    """An issued token authenticates its user under an integer ID."""
+    token = create_access_token({"sub": "42", "email": "a@example.com"})
+
+    context = get_auth_context(_scope(f"Bearer {token}"))
+
+    assert context.error is None
+    assert context.user_id == 42
+    assert context.payload["email"] == "a@example.com"
+
+
+def test_context_is_reused_within_a_request():
+    """A request's token is verified once, however often the context is asked for."""
+    token = create_access_token({"sub": "42"})
+    scope = _scope(f"Bearer {token}")
+
+    first = get_auth_context(scope)
+    second = get_auth_context(scope)
+
+    assert first is second
+    assert metrics.get("jwt_verifications_total", result="verified") == 1
+    assert metrics.get("jwt_verifications_total", result="cached") == 0
+
+
+def test_non_numeric_subject_is_rejected():
+    """A token whose subject is not a user ID does not authenticate."""
+    token = create_access_token({"sub": "alice"})
+
+    context = get_auth_context(_scope(f"Bearer {token}"))
+
+    assert context.error == "Invalid token payload"
+    assert context.user_id is None
+
+
+def test_missing_or_malformed_header():
+    """Requests without a usable bearer token are unauthenticated."""
+    assert get_auth_context(_scope()).error == "Authorization header required"
+    assert get_auth_context(_scope("Basic abc")).error == "Invalid authorization scheme"
+    assert get_auth_context(_scope("Bearer garbage")).error == "Invalid or expired token"
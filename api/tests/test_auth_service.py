@@ -0,0 +1,146 @@
+"""
+Tests for registration and token issue and refresh.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.auth_context import get_auth_context
+from app.core.cache import CacheKeys, cache_get
+from app.core.database import _run_after_commit_hooks
+from app.core.exceptions import ConflictException, UnauthorizedException
+from app.models import User
+from app.services.user_service import cache_principal
+
+# Needs the request and response schemas
+auth_service = pytest.importorskip("app.services.auth_service", exc_type=ImportError)
+
+
+def _service():
+    """An auth service over a session that is never really opened."""
+    return auth_service.AuthService(SimpleNamespace(info={}))
+
+
+def _user():
+    """A user who has already been stored."""
+    return User(id=7, email="a@example.com", password_hash="hash")
+
+
+def test_issued_token_round_trips():
+    """An issued access token authenticates the user it was issued to."""
+    async def scenario():
+        return await _service()._issue_tokens(_user())
+
+    response, refresh_token = asyncio.run(scenario())
+    authorization = f"Bearer {response.access_token}".encode()
+    scope = {"type": "http", "headers": [(b"authorization", authorization)]}
+
+    assert get_auth_context(scope).user_id == 7
+    assert refresh_token is not None
+
+
+def test_refresh_rotates_token():
+    """Refreshing issues a new refresh token and consumes the old one."""
+    service = _service()
+
+    async def scenario():
+        await cache_principal(_user())
+        _, refresh_token = await service._issue_tokens(_user())
+
+        _, rotated = await service.refresh(refresh_token)
+        assert rotated != refresh_token
+
+        with pytest.raises(UnauthorizedException):
+            await service.refresh(refresh_token)
+        await service.refresh(rotated)
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_replay_is_rejected():
+    """Of two requests racing with one refresh token, only one succeeds."""
+    service = _service()
+
+    async def scenario():
+        await cache_principal(_user())
+        _, refresh_token = await service._issue_tokens(_user())
+        return await asyncio.gather(
+            service.refresh(refresh_token),
+            service.refresh(refresh_token),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+
+    assert sum(isinstance(result, UnauthorizedException) for result in results) == 1
+
+
+class FakeUserRepository:
+    """Stores users in a dict keyed by lowercased email."""
+
+    def __init__(self, emails=()):
+        self.users = {email: _user() for email in emails}
+        self.probes = 0
+
+    async def exists_by_email(self, email):
+        self.probes += 1
+        return email.lower() in self.users
+
+    async def create_if_absent(self, email, password_hash):
+        if email.lower() in self.users:
+            return None
+        user = User(id=len(self.users) + 1, email=email, password_hash=password_hash)
+        self.users[email.lower()] = user
+        return user
+
+
+def _registering(monkeypatch, emails=()):
+    """An auth service over the given registered emails that records hashes."""
+    hashed = []
+
+    async def hash_password(password):
+        hashed.append(password)
+        return "hash"
+
+    monkeypatch.setattr(auth_service, "hash_password", hash_password)
+    service = _service()
+    service.user_repo = FakeUserRepository(emails)
+    return service, hashed
+
+
+def _registration(email):
+    """A registration request with an acceptable password."""
+    return auth_service.RegisterRequest(email=email, password="Correct-Horse-9-Battery")
+
+
+def test_registered_email_rejected_before_hashing(monkeypatch):
+    """A taken email is found by the index probe, then by the cache."""
+    service, hashed = _registering(monkeypatch, ["a@example.com"])
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ConflictException):
+                await service.register(_registration("A@example.com"))
+
+    asyncio.run(scenario())
+
+    assert hashed == []
+    assert service.user_repo.probes == 1
+
+
+def test_new_email_known_after_commit(monkeypatch):
+    """Once a registration commits, repeating it is answered from the cache."""
+    service, hashed = _registering(monkeypatch)
+
+    async def scenario():
+        await service.register(_registration("b@example.com"))
+        assert await cache_get(CacheKeys.known_email_key("b@example.com")) is None
+
+        await _run_after_commit_hooks(service.db)
+        assert await cache_get(CacheKeys.known_email_key("b@example.com")) is True
+
+    asyncio.run(scenario())
+
+    assert len(hashed) == 1
@@ -0,0 +1,118 @@
+"""
+Tests for the rate limiting and security headers middleware.
+"""
+
+import asyncio
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.rate_limit_policy import RateLimitPolicy, RateLimitPolicyTable, rate_limit_policy
+from app.middleware import rate_limit
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.security import SecurityHeadersMiddleware
+
+ITEMS_POLICY = RateLimitPolicy("items", limit=2, window=60)
+
+
+@rate_limit_policy(ITEMS_POLICY)
+async def items(request):
+    return PlainTextResponse("items", headers={"X-Frame-Options": "SAMEORIGIN"})
+
+
+async def healthz(request):
+    return PlainTextResponse("ok")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """The middleware stacked as in the application, around two routes."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "HEAVY_HITTERS_ENABLED", False)
+    routes = [Route("/api/v1/items", items), Route("/healthz", healthz)]
+    table = RateLimitPolicyTable(None, prefix="/api/v1/")
+    table.compile(routes)
+    monkeypatch.setattr(rate_limit, "policy_table", table)
+
+    app = RateLimitMiddleware(Starlette(routes=routes))
+    app = CORSMiddleware(app, allow_origins=["https://app.example.com"])
+    return SecurityHeadersMiddleware(app)
+
+
+def _get(app, path, headers=()):
+    """Send a GET through the ASGI interface and collect the response."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "client": ("10.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def scenario():
+        await app(scope, receive, send)
+
+    asyncio.run(scenario())
+
+    start = messages[0]
+    response_headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], response_headers, body
+
+
+def test_allowed_requests_carry_limit_headers(app):
+    """Allowed responses report the remaining budget under the security headers."""
+    status, headers, body = _get(app, "/api/v1/items")
+
+    assert status == 200
+    assert body == b"items"
+    assert headers["x-ratelimit-limit"] == "2"
+    assert headers["x-ratelimit-remaining"] == "1"
+    assert headers["x-content-type-options"] == "nosniff"
+    # The endpoint's own value is replaced, not duplicated
+    assert headers["x-frame-options"] == "DENY"
+
+
+def test_rejection_carries_cors_and_security_headers(app):
+    """Requests over the limit get a 429 a browser can read."""
+    origin = [("origin", "https://app.example.com")]
+    for _ in range(2):
+        _get(app, "/api/v1/items", origin)
+
+    status, headers, body = _get(app, "/api/v1/items", origin)
+
+    assert status == 429
+    assert json.loads(body)["error"]["code"] == "RATE_LIMIT_EXCEEDED"
+    assert int(headers["retry-after"]) >= 1
+    assert headers["x-ratelimit-remaining"] == "0"
+    assert headers["content-length"] == str(len(body))
+    assert headers["access-control-allow-origin"] == "https://app.example.com"
+    assert headers["x-content-type-options"] == "nosniff"
+
+
+def test_unlimited_paths_pass_through(app):
+    """Exempt paths are neither counted nor given limit headers."""
+    for _ in range(3):
+        status, headers, _ = _get(app, "/healthz")
+
+    assert status == 200
+    assert "x-ratelimit-limit" not in headers
+    assert headers["x-content-type-options"] == "nosniff"
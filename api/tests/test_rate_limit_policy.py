@@ -0,0 +1,78 @@
+"""
+Tests for rate limit policies.
+"""
+
+import pytest
+from fastapi import FastAPI
+
+from app.core.rate_limit_policy import (
+    KEY_IP,
+    KEY_USER_AND_IP,
+    RateLimitPolicy,
+    RateLimitPolicyTable,
+    rate_limit_policy,
+)
+
+DEFAULT = RateLimitPolicy("api", limit=100, window=60)
+LOGIN = RateLimitPolicy("login", limit=5, window=900, key=KEY_IP)
+EXPORT = RateLimitPolicy("export", limit=10, window=60, cost=5)
+
+
+def _table():
+    """A policy table compiled from a small application."""
+    app = FastAPI()
+
+    @app.post("/api/v1/auth/login")
+    @rate_limit_policy(LOGIN)
+    async def login():
+        pass
+
+    @app.get("/api/v1/todos/{todo_id}/export")
+    @rate_limit_policy(EXPORT)
+    async def export(todo_id: int):
+        pass
+
+    @app.get("/api/v1/todos")
+    async def todos():
+        pass
+
+    table = RateLimitPolicyTable(DEFAULT, prefix="/api/v1/")
+    table.compile(app.routes)
+    return table
+
+
+def test_routes_resolve_to_their_policies():
+    """Static and templated routes resolve to the policy they declare."""
+    table = _table()
+
+    assert table.resolve("POST", "/api/v1/auth/login") is LOGIN
+    assert table.resolve("GET", "/api/v1/todos/7/export") is EXPORT
+
+
+def test_other_requests_fall_back():
+    """Undeclared API routes share the default; other paths are not limited."""
+    table = _table()
+
+    assert table.resolve("GET", "/api/v1/todos") is DEFAULT
+    # Only POST declares the login policy
+    assert table.resolve("GET", "/api/v1/auth/login") is DEFAULT
+    assert table.resolve("GET", "/api/v1/no-such-route") is DEFAULT
+    assert table.resolve("GET", "/docs") is None
+
+
+def test_policy_identifiers():
+    """Requests are keyed by user, IP, or both as the policy says."""
+    both = RateLimitPolicy("upload", limit=10, window=60, key=KEY_USER_AND_IP)
+
+    assert DEFAULT.identifier("42", "10.0.0.1") == "42"
+    assert DEFAULT.identifier(None, "10.0.0.1") == "10.0.0.1"
+    assert LOGIN.identifier("42", "10.0.0.1") == "10.0.0.1"
+    assert both.identifier("42", "10.0.0.1") == "42:10.0.0.1"
+
+
+def test_invalid_policies():
+    """Policies must use a known key and a cost within the limit."""
+    with pytest.raises(ValueError):
+        RateLimitPolicy("api", limit=10, window=60, key="session")
+    with pytest.raises(ValueError):
+        RateLimitPolicy("api", limit=10, window=60, cost=11)
@@ -0,0 +1,37 @@
+"""
+Tests for access token revocation.
+"""
+
+import asyncio
+import time
+
+from app.core.metrics import metrics
+from app.core.revocation import TokenRevocations
+
+
+def test_revocations_reach_other_workers_on_sync():
+    """A token revoked on one worker is revoked on another once it syncs."""
+    revoking, other = TokenRevocations(), TokenRevocations()
+
+    async def scenario():
+        await other.sync()
+        await revoking.revoke("token-1", time.time() + 60)
+
+        assert await revoking.is_revoked("token-1")
+        assert not await other.is_revoked("token-1")
+        await other.sync()
+        assert await other.is_revoked("token-1")
+        assert not await other.is_revoked("token-2")
+
+    asyncio.run(scenario())
+
+    assert metrics.get("token_revocation_filter_entries") == 1
+
+
+def test_filter_hits_are_confirmed():
+    """A filter hit without a recorded revocation is a false positive."""
+    revocations = TokenRevocations()
+    revocations.filter.add("token-1")
+
+    assert not asyncio.run(revocations.is_revoked("token-1"))
+    assert metrics.get("token_revocation_checks_total", result="false_positive") == 1
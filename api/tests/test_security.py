@@ -0,0 +1,77 @@
+"""
+Tests for password hashing and tokens.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import security
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.metrics import metrics
+
+
+def test_hashing_shed_when_queue_is_full(monkeypatch):
+    """Hashing beyond the queue limit fails fast with a 503."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 0)
+
+    with pytest.raises(ServiceUnavailableException) as excinfo:
+        asyncio.run(security.hash_password("correct horse battery staple"))
+
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.details["retry_after"] >= 1
+    assert metrics.get(
+        "password_hash_rejections_total", operation="hash", reason="queue_full"
+    ) == 1
+
+
+def test_hashing_shed_after_max_wait(monkeypatch):
+    """Hashing that waits too long for a slot fails with a 503."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE_WAIT_MS", 10)
+    # Every slot is taken
+    monkeypatch.setattr(security, "_hash_slots", asyncio.Semaphore(0))
+
+    with pytest.raises(ServiceUnavailableException):
+        asyncio.run(security.verify_password("password", "hash"))
+
+    assert metrics.get(
+        "password_hash_rejections_total", operation="verify", reason="timeout"
+    ) == 1
+    assert security._hashes_waiting == 0
+
+
+def _calibrating(monkeypatch, costs):
+    """Calibrate bcrypt against a target, measuring the given costs in turn."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "bcrypt")
+    monkeypatch.setattr(settings, "PASSWORD_HASH_TARGET_MS", 250)
+    monkeypatch.setattr(security, "pwd_context", security.pwd_context)
+    measured = iter(costs)
+    monkeypatch.setattr(security, "_measure_cost", lambda scheme, target: next(measured))
+
+
+def test_concurrent_calibrations_agree(monkeypatch):
+    """Workers calibrating at once all adopt the first stored cost."""
+    _calibrating(monkeypatch, [11, 12])
+
+    async def scenario():
+        return await asyncio.gather(
+            security.calibrate_password_hashing(), security.calibrate_password_hashing()
+        )
+
+    costs = asyncio.run(scenario())
+
+    assert costs[0] == costs[1]
+    assert metrics.get("password_hash_cost", scheme="bcrypt") == costs[0]
+
+
+def test_forced_calibration_replaces_shared_cost(monkeypatch):
+    """force measures again and shares the new cost."""
+    _calibrating(monkeypatch, [11, 12])
+
+    async def scenario():
+        assert await security.calibrate_password_hashing() == 11
+        assert await security.calibrate_password_hashing(force=True) == 12
+        assert await security.calibrate_password_hashing() == 12
+
+    asyncio.run(scenario())
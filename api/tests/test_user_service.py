@@ -0,0 +1,64 @@
+"""
+Tests for the authenticated principal cache.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.core.cache import CacheKeys, cache_get
+from app.core.database import _run_after_commit_hooks
+from app.models import User
+from app.services.user_service import UserService
+
+
+class FakeUserRepository:
+    """Serves users from a dict and counts lookups."""
+
+    def __init__(self, users):
+        self.users = users
+        self.lookups = 0
+
+    async def get_by_id(self, user_id):
+        self.lookups += 1
+        return self.users.get(user_id)
+
+
+def _service(users):
+    """A user service over a session that is never really opened."""
+    service = UserService(SimpleNamespace(info={}))
+    service.user_repo = FakeUserRepository(users)
+    return service
+
+
+def test_principal_is_cached_without_password_hash():
+    """Principals are loaded once and never cache the password hash."""
+    service = _service({1: User(id=1, email="a@example.com", password_hash="hash")})
+
+    async def scenario():
+        first = await service.get_principal(1)
+        second = await service.get_principal(1)
+        assert first.email == second.email == "a@example.com"
+        assert "password_hash" not in await cache_get(CacheKeys.user_key(1))
+
+    asyncio.run(scenario())
+
+    assert service.user_repo.lookups == 1
+
+
+def test_principal_invalidated_after_commit():
+    """A changed user is reloaded once the transaction commits."""
+    users = {1: User(id=1, email="a@example.com", password_hash="hash")}
+    service = _service(users)
+
+    async def scenario():
+        await service.get_principal(1)
+        users[1] = User(id=1, email="b@example.com", password_hash="hash")
+        service.invalidate_principal(1)
+
+        assert (await service.get_principal(1)).email == "a@example.com"
+        await _run_after_commit_hooks(service.db)
+        assert (await service.get_principal(1)).email == "b@example.com"
+
+    asyncio.run(scenario())
+
+    assert service.user_repo.lookups == 2
@@ -0,0 +1,75 @@
+"""
+Request-scoped authentication context.
+
+This module verifies a request's bearer token once and stores the outcome
+on the ASGI scope, so middleware and dependencies share a single
+verification instead of each decoding the token.
+"""
+
+from typing import Any, Dict, MutableMapping, Optional
+
+from app.core.security import decode_access_token
+
+# Scope key holding the request's AuthContext, namespaced clear of
+# Starlette's own "auth", which AuthenticationMiddleware sets
+AUTH_SCOPE_KEY = "app.auth_context"
+
+
+class AuthContext:
+    """Outcome of authenticating a request's bearer token.
+    
+    Holds the verified token payload and the ID of the user it was issued
+    to, or the reason the request is not authenticated.
+    """
+    
+    def __init__(
+        self,
+        payload: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None,
+        error: Optional[str] = None,
+    ):
+        self.payload = payload
+        self.user_id = user_id
+        self.error = error
+
+
+def get_auth_context(scope: MutableMapping[str, Any]) -> AuthContext:
+    """Get the request's authentication context, verifying its token on first use."""
+    context = scope.get(AUTH_SCOPE_KEY)
+    if not isinstance(context, AuthContext):
+        context = _authenticate(scope)
+        scope[AUTH_SCOPE_KEY] = context
+    return context
+
+
+def _authenticate(scope: MutableMapping[str, Any]) -> AuthContext:
+    """Verify the bearer token in the request's Authorization header."""
+    authorization = None
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            break
+    
+    if not authorization:
+        return AuthContext(error="Authorization header required")
+    
+    try:
+        scheme, token = authorization.split(" ", 1)
+    except ValueError:
+        return AuthContext(error="Invalid authorization header format")
+    
+    if scheme.lower() != "bearer":
+        return AuthContext(error="Invalid authorization scheme")
+    
+    try:
+        payload = decode_access_token(token)
+    except ValueError:
+        return AuthContext(error="Invalid or expired token")
+    
+    # The subject is the user's ID, which JWT carries as a string
+    try:
+        user_id = int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        return AuthContext(error="Invalid token payload")
+    
+    return AuthContext(payload=payload, user_id=user_id)
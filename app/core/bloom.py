@@ -0,0 +1,51 @@
+"""
+Bloom filter.
+
+This module provides a fixed-size Bloom filter, a set membership test that
+can return false positives but never false negatives, used to answer
+"definitely not present" without a network round trip.
+"""
+
+import hashlib
+import math
+from typing import Iterator
+
+
+class BloomFilter:
+    """Bloom filter sized for capacity items at the given false positive rate.
+    
+    Adding more than capacity items keeps working but raises the false
+    positive rate; rebuild a larger filter when that happens.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item: str) -> Iterator[int]:
+        """Get the bit positions of an item by double hashing one digest."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+    
+    def add(self, item: str) -> None:
+        """Add an item."""
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+    
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,96 @@
+"""
+Circuit breaker utilities.
+
+This module provides a circuit breaker that bounds the latency of calls to
+an external dependency and stops calling it while it is unhealthy.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Circuit breaker with per-call deadlines and background recovery probes.
+    
+    The circuit opens after failure_threshold consecutive failures or
+    timeouts. While open, calls fail immediately and a background task runs
+    probe with exponential backoff, closing the circuit on the first success.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Awaitable[None]],
+        failure_threshold: int,
+        min_backoff: float,
+        max_backoff: float,
+        probe_timeout: float = 1.0,
+    ):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.probe_timeout = probe_timeout
+        self.consecutive_failures = 0
+        self._open = False
+        self._probe_task: Optional[asyncio.Task] = None
+    
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being short-circuited."""
+        return self._open
+    
+    async def call(self, operation: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """Run operation within timeout seconds unless the circuit is open."""
+        if self._open:
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        
+        try:
+            result = await asyncio.wait_for(operation(), timeout)
+        except Exception:
+            self._record_failure()
+            raise
+        
+        self.consecutive_failures = 0
+        return result
+    
+    def _record_failure(self) -> None:
+        """Count a failure and open the circuit once the threshold is hit."""
+        self.consecutive_failures += 1
+        
+        if not self._open and self.consecutive_failures >= self.failure_threshold:
+            self._open = True
+            self._probe_task = asyncio.create_task(self._probe_until_healthy())
+    
+    async def _probe_until_healthy(self) -> None:
+        """Probe the dependency with backoff and close the circuit on success."""
+        backoff = self.min_backoff
+        
+        while True:
+            await asyncio.sleep(backoff)
+            try:
+                await asyncio.wait_for(self.probe(), self.probe_timeout)
+            except Exception:
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            
+            self.consecutive_failures = 0
+            self._open = False
+            return
+    
+    async def close(self) -> None:
+        """Stop any probe in progress."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
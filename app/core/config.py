@@ -44,6 +44,82 @@ class Settings(BaseSettings):
         description="Redis connection URL",
     )
     REDIS_ENABLED: bool = Field(default=True, description="Enable Redis caching")
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = Field(
+        default=1.0, description="Redis connect and socket timeout in seconds"
+    )
+    REDIS_CIRCUIT_FAILURE_THRESHOLD: int = Field(
+        default=5, description="Consecutive Redis failures before the circuit opens"
+    )
+    REDIS_CIRCUIT_PROBE_MIN_SECONDS: float = Field(
+        default=0.5, description="Initial delay between Redis recovery probes"
+    )
+    REDIS_CIRCUIT_PROBE_MAX_SECONDS: float = Field(
+        default=30.0, description="Maximum delay between Redis recovery probes"
+    )
+    CACHE_READ_TIMEOUT_MS: int = Field(
+        default=50, description="Deadline for a single cache read in milliseconds"
+    )
+    CACHE_WRITE_TIMEOUT_MS: int = Field(
+        default=250, description="Deadline for a single cache write in milliseconds"
+    )
+
+    # Cache
+    CACHE_BACKEND: str = Field(
+        default="redis",
+        description="Cache backend: redis, memory (single-node only) or none",
+    )
+    CACHE_MEMORY_MAX_ENTRIES: int = Field(
+        default=100000, description="Maximum entries held by the in-memory cache backend"
+    )
+    CACHE_DEPLOY_VERSION: str = Field(
+        default="",
+        description="Optional release identifier embedded in cache keys",
+    )
+    CACHE_TODO_LIST_TTL_SECONDS: int = Field(
+        default=60, description="TTL for cached todo lists in seconds"
+    )
+    CACHE_TODO_TTL_SECONDS: int = Field(
+        default=300, description="TTL for cached single todos in seconds"
+    )
+    CACHE_PRINCIPAL_TTL_SECONDS: int = Field(
+        default=60, description="TTL for cached authenticated users in seconds"
+    )
+    CACHE_KNOWN_EMAIL_TTL_SECONDS: int = Field(
+        default=3600, description="TTL for cached emails found to be registered"
+    )
+    CACHE_NEGATIVE_TTL_SECONDS: int = Field(
+        default=30, description="TTL for cached lookups that found nothing"
+    )
+    CACHE_WARM_ON_LOGIN: bool = Field(
+        default=True, description="Prefetch a user's principal and todo list into the cache on login"
+    )
+    CACHE_COMPRESSION_ENABLED: bool = Field(
+        default=True, description="Compress large cache payloads"
+    )
+    CACHE_COMPRESSION_MIN_BYTES: int = Field(
+        default=1024, description="Minimum payload size in bytes before compressing"
+    )
+    CACHE_LOCAL_ENABLED: bool = Field(
+        default=True, description="Enable the in-process cache tier in front of Redis"
+    )
+    CACHE_LOCAL_MAX_ENTRIES: int = Field(
+        default=10000, description="Maximum entries held in the in-process cache tier"
+    )
+    CACHE_LOCAL_TTL_SECONDS: int = Field(
+        default=5, description="Maximum TTL for in-process cache entries in seconds"
+    )
+    CACHE_REFRESH_AHEAD_SECONDS: int = Field(
+        default=0,
+        description="Reload entries in the background this many seconds before "
+        "they expire (0 disables refresh-ahead)",
+    )
+
+    # Metrics
+    METRICS_ENABLED: bool = Field(
+        default=False,
+        description="Expose the unauthenticated /metrics endpoint; only enable "
+        "it where the port is not reachable from outside",
+    )
 
     # Security
     ALLOWED_HOSTS: List[str] = Field(
@@ -61,6 +137,21 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(
         default=1440, description="JWT access token expiration in minutes"
     )
+    JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = Field(
+        default=30, description="Refresh token expiration in days"
+    )
+    TOKEN_REVOCATION_SYNC_SECONDS: float = Field(
+        default=1.0, description="Interval between revocation list syncs in seconds"
+    )
+    TOKEN_REVOCATION_FILTER_CAPACITY: int = Field(
+        default=100000, description="Revoked tokens the per-worker filter is sized for"
+    )
+    TOKEN_REVOCATION_FILTER_ERROR_RATE: float = Field(
+        default=0.01, description="Target false positive rate of the revocation filter"
+    )
+    JWT_VERIFIED_CACHE_MAX_ENTRIES: int = Field(
+        default=10000, description="Recently verified tokens kept per worker"
+    )
 
     # Password
     PASSWORD_MIN_LENGTH: int = Field(default=12, description="Minimum password length")
@@ -76,13 +167,53 @@ class Settings(BaseSettings):
     PASSWORD_REQUIRE_SPECIAL: bool = Field(
         default=True, description="Require special character in password"
     )
+    PASSWORD_HASH_SCHEME: str = Field(
+        default="bcrypt", description="Password hashing scheme (bcrypt or argon2)"
+    )
     BCRYPT_ROUNDS: int = Field(default=12, description="Bcrypt rounds")
+    ARGON2_TIME_COST: int = Field(default=3, description="Argon2 iterations")
+    ARGON2_MEMORY_COST_KIB: int = Field(
+        default=65536, description="Argon2 memory per hash in KiB"
+    )
+    PASSWORD_HASH_TARGET_MS: int = Field(
+        default=0,
+        description="Target hashing latency in milliseconds used to calibrate "
+        "the hashing cost at startup, 0 to use the configured cost",
+    )
+    PASSWORD_HASH_WORKERS: int = Field(
+        default=4, description="Threads dedicated to password hashing"
+    )
+    PASSWORD_HASH_MAX_QUEUE: int = Field(
+        default=64, description="Maximum password hashes waiting for a thread"
+    )
+    PASSWORD_HASH_MAX_QUEUE_WAIT_MS: int = Field(
+        default=2000, description="Maximum wait for a password hashing thread in milliseconds"
+    )
 
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = Field(default=True, description="Enable rate limiting")
     RATE_LIMIT_PER_MINUTE: int = Field(
         default=100, description="Requests per minute per user"
     )
+    RATE_LIMIT_API_APPROXIMATE: bool = Field(
+        default=True,
+        description="Count generic API requests locally and sync them to the "
+        "cache backend in batches instead of on every request",
+    )
+    RATE_LIMIT_SYNC_INTERVAL_MS: int = Field(
+        default=250, description="Interval between batched rate limit syncs in milliseconds"
+    )
+    RATE_LIMIT_LOCAL_MAX_COUNTERS: int = Field(
+        default=10000, description="Rate limit counters kept per worker between batched syncs"
+    )
+    RATE_LIMIT_WORKER_COUNT: int = Field(
+        default=1,
+        description="Workers sharing the rate limits, across all instances; "
+        "in-process fallback limits are divided by it",
+    )
+    RATE_LIMIT_FALLBACK_MAX_IDENTIFIERS: int = Field(
+        default=10000, description="Identifiers tracked per worker by the fallback limiter"
+    )
     RATE_LIMIT_LOGIN_ATTEMPTS: int = Field(
         default=5, description="Login attempts per window"
     )
@@ -96,6 +227,20 @@ class Settings(BaseSettings):
         default=1, description="Registration rate limit window in hours"
     )
 
+    # Heavy hitters
+    HEAVY_HITTERS_ENABLED: bool = Field(
+        default=True, description="Track the users and client IPs sending the most requests"
+    )
+    HEAVY_HITTERS_CAPACITY: int = Field(
+        default=1000, description="Users and client IPs tracked per worker, each"
+    )
+    HEAVY_HITTERS_WINDOW_SECONDS: int = Field(
+        default=60, description="Window over which heavy hitters are counted"
+    )
+    ADMIN_EMAILS: List[str] = Field(
+        default_factory=list, description="Emails of the users allowed to use admin endpoints"
+    )
+
     @field_validator("SECRET_KEY", "JWT_SECRET_KEY")
     @classmethod
     def validate_secret_key(cls, v: str) -> str:
@@ -112,6 +257,24 @@ class Settings(BaseSettings):
             raise ValueError("Database URL must start with postgresql:// or postgresql+asyncpg://")
         return v
 
+    @field_validator("CACHE_BACKEND")
+    @classmethod
+    def validate_cache_backend(cls, v: str) -> str:
+        """Validate cache backend name."""
+        v = v.lower()
+        if v not in ("redis", "memory", "none"):
+            raise ValueError("Cache backend must be one of: redis, memory, none")
+        return v
+
+    @field_validator("PASSWORD_HASH_SCHEME")
+    @classmethod
+    def validate_password_hash_scheme(cls, v: str) -> str:
+        """Validate password hashing scheme name."""
+        v = v.lower()
+        if v not in ("bcrypt", "argon2"):
+            raise ValueError("Password hash scheme must be one of: bcrypt, argon2")
+        return v
+
     @field_validator("PASSWORD_MIN_LENGTH")
     @classmethod
     def validate_password_length(cls, v: int) -> int:
@@ -74,6 +74,13 @@ class RateLimitException(AppException):
         super().__init__(message, 429, "RATE_LIMIT_EXCEEDED", details)
 
 
+class ServiceUnavailableException(AppException):
+    """503 Service Unavailable exception."""
+
+    def __init__(self, message: str = "Service temporarily unavailable", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, 503, "SERVICE_UNAVAILABLE", details)
+
+
 class InternalServerException(AppException):
     """500 Internal Server Error exception."""
 
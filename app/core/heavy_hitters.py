@@ -0,0 +1,265 @@
+"""
+Heavy hitter detection.
+
+This module finds the users and client IPs sending the most requests,
+in constant memory. Each worker keeps a Space-Saving summary per kind of
+identifier, counting requests and their cumulative latency, over tumbling
+windows. At the end of every window the worker publishes its summaries
+to the cache backend, where they are merged into a view across workers.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import CacheKeys, cache_get, cache_set, get_cache
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Kinds of identifier tracked
+KIND_USER = "user"
+KIND_IP = "ip"
+
+
+class _Counter:
+    """Counts for one tracked key."""
+    
+    __slots__ = ("count", "error", "latency")
+    
+    def __init__(self, count: int, error: int):
+        self.count = count
+        # Overestimation inherited from the key this one replaced
+        self.error = error
+        # Seconds spent on the requests seen since the key was tracked
+        self.latency = 0.0
+
+
+class SpaceSaving:
+    """Space-Saving summary of the most frequent keys in a stream.
+    
+    Tracks at most capacity keys. A new key replaces the least frequent
+    one and inherits its count as error, so a key's count is never lower
+    than its true count and at most error higher. Every key seen more
+    often than total / capacity times is guaranteed to be tracked.
+    
+    Keys are grouped by count, so recording a request and finding the
+    key to replace both take constant time.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.total = 0
+        self._counters: Dict[str, _Counter] = {}
+        # Keys by count, for the counts in use; dicts keep insertion order
+        self._by_count: Dict[int, Dict[str, None]] = {}
+        self._min_count = 0
+    
+    def add(self, key: str, latency: float = 0.0) -> None:
+        """Record a request for key taking latency seconds."""
+        self.total += 1
+        counter = self._counters.get(key)
+        
+        if counter is None:
+            if len(self._counters) < self.capacity:
+                counter = _Counter(0, 0)
+            else:
+                # Replace the least frequent key, which has been tracked
+                # the shortest among the least frequent ones
+                keys = self._by_count[self._min_count]
+                victim = next(iter(keys))
+                del keys[victim]
+                del self._counters[victim]
+                keys[key] = None
+                counter = _Counter(self._min_count, self._min_count)
+            self._counters[key] = counter
+        
+        count = counter.count
+        if count:
+            keys = self._by_count[count]
+            del keys[key]
+            if not keys:
+                del self._by_count[count]
+        self._by_count.setdefault(count + 1, {})[key] = None
+        counter.count = count + 1
+        counter.latency += latency
+        
+        if count == 0 or (count == self._min_count and count not in self._by_count):
+            self._min_count = count + 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the summary as plain data, most frequent keys first."""
+        entries = sorted(
+            ([key, c.count, c.error, c.latency] for key, c in self._counters.items()),
+            key=lambda entry: entry[1],
+            reverse=True,
+        )
+        return {
+            "total": self.total,
+            # Untracked keys may have been seen this often, once full
+            "min_count": self._min_count if len(self._counters) >= self.capacity else 0,
+            "entries": entries,
+        }
+    
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+def merge_snapshots(snapshots: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """Merge summary snapshots into the limit most frequent keys.
+    
+    A key missing from a full summary may still have been seen up to that
+    summary's min_count times, so that much is added to its count and
+    error, keeping merged counts upper bounds with a known error.
+    """
+    min_total = sum(snapshot["min_count"] for snapshot in snapshots)
+    merged: Dict[str, List[float]] = {}
+    for snapshot in snapshots:
+        for key, count, error, latency in snapshot["entries"]:
+            entry = merged.get(key)
+            if entry is None:
+                # Start as missing from every summary, then swap in the
+                # actual counts of the summaries tracking the key
+                entry = merged[key] = [min_total, min_total, 0.0]
+            entry[0] += count - snapshot["min_count"]
+            entry[1] += error - snapshot["min_count"]
+            entry[2] += latency
+    
+    top = sorted(merged.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+    return {
+        "total": sum(snapshot["total"] for snapshot in snapshots),
+        "top": [
+            {
+                "key": key,
+                "count": count,
+                "error": error,
+                "latency_seconds": latency,
+                # Latency is only known for the requests seen while tracked
+                "mean_latency_seconds": latency / max(1, count - error),
+            }
+            for key, (count, error, latency) in top
+        ],
+    }
+
+
+class HeavyHitters:
+    """Heavy hitters by user and client IP on this worker.
+    
+    Counts requests in tumbling windows of HEAVY_HITTERS_WINDOW_SECONDS.
+    The last complete window is published for the other workers, and the
+    published windows of all workers are merged on request.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.worker_id = ""
+        self.last_snapshot: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Start a new window."""
+        self._window_started = time.time()
+        self._summaries = {
+            KIND_USER: SpaceSaving(self.capacity),
+            KIND_IP: SpaceSaving(self.capacity),
+        }
+    
+    def record(self, user_id: Optional[str], client_ip: str, latency: float) -> None:
+        """Record a request from client_ip, by user_id if authenticated."""
+        if user_id:
+            self._summaries[KIND_USER].add(user_id, latency)
+        self._summaries[KIND_IP].add(client_ip, latency)
+    
+    def rotate(self) -> Dict[str, Any]:
+        """End the current window and get its snapshot."""
+        snapshot = {
+            "worker": self.worker_id,
+            "started": self._window_started,
+            "ended": time.time(),
+            KIND_USER: self._summaries[KIND_USER].snapshot(),
+            KIND_IP: self._summaries[KIND_IP].snapshot(),
+        }
+        self._reset()
+        self.last_snapshot = snapshot
+        return snapshot
+    
+    async def publish(self) -> None:
+        """End the current window and publish it for the other workers."""
+        snapshot = self.rotate()
+        
+        backend = get_cache()
+        if backend is None:
+            return
+        
+        # A window stays visible until the next one replaces it
+        ttl = settings.HEAVY_HITTERS_WINDOW_SECONDS * 2
+        await cache_set(CacheKeys.heavy_hitters_key(self.worker_id), snapshot, ttl)
+        try:
+            log_key = CacheKeys.heavy_hitters_log_key()
+            await backend.append_log(log_key, self.worker_id, snapshot["ended"])
+            await backend.trim_log(log_key, snapshot["ended"] - ttl)
+        except Exception:
+            metrics.inc("heavy_hitters_publish_errors_total")
+    
+    async def collect(self, limit: int) -> Dict[str, Any]:
+        """Merge the last complete window of every worker.
+        
+        Only this worker's window is included when the cache backend
+        cannot be reached.
+        """
+        snapshots: List[Dict[str, Any]] = []
+        backend = get_cache()
+        if backend is not None:
+            since = time.time() - settings.HEAVY_HITTERS_WINDOW_SECONDS * 2
+            try:
+                workers = await backend.read_log(CacheKeys.heavy_hitters_log_key(), since)
+            except Exception:
+                workers = []
+            for worker_id, _ in workers:
+                snapshot = await cache_get(CacheKeys.heavy_hitters_key(worker_id))
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        
+        if not snapshots and self.last_snapshot is not None:
+            snapshots.append(self.last_snapshot)
+        
+        return {
+            "window_seconds": settings.HEAVY_HITTERS_WINDOW_SECONDS,
+            "workers": len(snapshots),
+            "users": merge_snapshots([s[KIND_USER] for s in snapshots], limit),
+            "ips": merge_snapshots([s[KIND_IP] for s in snapshots], limit),
+        }
+    
+    async def _publish_forever(self) -> None:
+        """Publish at the end of every window until cancelled."""
+        while True:
+            await asyncio.sleep(settings.HEAVY_HITTERS_WINDOW_SECONDS)
+            try:
+                await self.publish()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                metrics.inc("heavy_hitters_publish_errors_total")
+    
+    async def start(self) -> None:
+        """Start counting windows and publishing them."""
+        # Known only once the worker process is running
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._reset()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._publish_forever())
+    
+    async def close(self) -> None:
+        """Stop publishing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+heavy_hitters = HeavyHitters(settings.HEAVY_HITTERS_CAPACITY)
@@ -0,0 +1,105 @@
+"""
+In-process cache tier.
+
+This module provides a size-bounded LRU cache with per-entry TTL, used both
+in front of Redis to serve hot reads without a network round trip and as
+the storage of the in-memory cache backend.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+
+class LocalCache:
+    """Size-bounded LRU cache with per-entry expiry.
+    
+    When ttl is set it caps the lifetime of every entry; otherwise entries
+    stored without a TTL never expire and are only removed by eviction.
+    on_evict is called with the key of every entry evicted for space.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[str], None]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # Advanced on every invalidation so readers can detect one that
+        # happened while they were fetching a value to store
+        self.epoch = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, returning None if missing or expired."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+    
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get a value and the seconds left before it expires."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value, remaining
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        self._store(key, value, self._expires_at(ttl))
+    
+    def incr(self, key: str, ttl: Optional[float] = None, amount: int = 1) -> int:
+        """Increment an integer entry by amount, starting from 0 if missing.
+        
+        The expiry of an existing entry is kept unless a new ttl is given.
+        """
+        entry = self.get_entry(key)
+        if entry is None:
+            value, expires_at = amount, self._expires_at(ttl)
+        else:
+            value = entry[0] + amount
+            expires_at = self._expires_at(ttl) if ttl is not None else self._entries[key][0]
+        
+        self._store(key, value, expires_at)
+        return value
+    
+    def delete(self, *keys: str) -> None:
+        """Remove entries if present."""
+        self.epoch += 1
+        for key in keys:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        self.epoch += 1
+        self._entries.clear()
+    
+    def _expires_at(self, ttl: Optional[float]) -> float:
+        """Get the expiry time for an entry stored now with ttl."""
+        limits = [limit for limit in (ttl, self.ttl) if limit is not None]
+        if not limits:
+            return math.inf
+        return time.monotonic() + min(limits)
+    
+    def _store(self, key: str, value: Any, expires_at: float) -> None:
+        """Store an entry and evict down to max_entries."""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
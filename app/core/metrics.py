@@ -0,0 +1,125 @@
+"""
+Application metrics.
+
+This module provides a lightweight in-process metrics registry with
+counters, gauges and histograms, rendered in the Prometheus text format.
+Metrics are per worker.
+"""
+
+import bisect
+from typing import Dict, List, Sequence, Tuple
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+# Default histogram buckets in seconds, from sub-millisecond cache hits up
+# to multi-second stalls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+class Histogram:
+    """Cumulative histogram over fixed bucket upper bounds."""
+    
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def snapshot(self) -> Dict[str, object]:
+        """Get the histogram's buckets, sum and count."""
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {"buckets": buckets, "sum": self.sum, "count": self.count}
+
+
+class MetricsRegistry:
+    """Registry of labelled counters, gauges and histograms."""
+    
+    def __init__(self):
+        self.counters: Dict[str, Dict[LabelSet, float]] = {}
+        self.gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self.histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+    
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> LabelSet:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+    
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Increment a counter."""
+        series = self.counters.setdefault(name, {})
+        key = self._labels(labels)
+        series[key] = series.get(key, 0) + amount
+    
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """Set a gauge to value."""
+        self.gauges.setdefault(name, {})[self._labels(labels)] = value
+    
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a value in a histogram."""
+        series = self.histograms.setdefault(name, {})
+        key = self._labels(labels)
+        if key not in series:
+            series[key] = Histogram()
+        series[key].observe(value)
+    
+    def get(self, name: str, **labels: str) -> float:
+        """Get the current value of a counter or gauge, 0 if unset."""
+        key = self._labels(labels)
+        series = self.counters.get(name) or self.gauges.get(name) or {}
+        return series.get(key, 0)
+    
+    def get_histogram(self, name: str, **labels: str) -> Dict[str, object]:
+        """Get a snapshot of a histogram, empty if unset."""
+        histogram = self.histograms.get(name, {}).get(self._labels(labels))
+        return (histogram or Histogram()).snapshot()
+    
+    def reset(self) -> None:
+        """Drop every recorded value."""
+        self.counters.clear()
+        self.gauges.clear()
+        self.histograms.clear()
+    
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        
+        for kind, families in (("counter", self.counters), ("gauge", self.gauges)):
+            for name, series in sorted(families.items()):
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items()):
+                snapshot = histogram.snapshot()
+                for bound, count in snapshot["buckets"].items():
+                    bucket_labels = labels + (("le", str(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+                inf_labels = labels + (("le", "+Inf"),)
+                lines.append(f"{name}_bucket{_format_labels(inf_labels)} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: LabelSet) -> str:
+    """Format a label set as {name="value",...}."""
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in labels)
+    return "{" + pairs + "}"
+
+
+metrics = MetricsRegistry()
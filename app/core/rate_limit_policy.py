@@ -0,0 +1,145 @@
+"""
+Rate limit policies.
+
+This module lets routes declare their own rate limits. A policy sets the
+limit, window, cost of one request and what requests are keyed by, and is
+attached to an endpoint with the rate_limit_policy decorator. At startup
+the routes are compiled into a table the middleware resolves each request
+against, without running the router.
+"""
+
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple, TypeVar
+
+from starlette.routing import BaseRoute, Route
+
+from app.core.config import settings
+
+F = TypeVar("F", bound=Callable)
+
+# What requests are counted per: the user if authenticated, else the IP;
+# the client IP; or the user and IP together
+KEY_USER = "user"
+KEY_IP = "ip"
+KEY_USER_AND_IP = "user_and_ip"
+
+# Attribute under which an endpoint carries its policy
+_POLICY_ATTRIBUTE = "__rate_limit_policy__"
+
+
+class RateLimitPolicy:
+    """Limit on requests to the routes sharing a policy name.
+    
+    Every request costs cost out of limit per window seconds. Routes with
+    the same name share one budget. Approximate policies are counted in
+    process and synced in batches; exact ones are checked atomically on
+    the cache backend on every request.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        window: int,
+        cost: int = 1,
+        key: str = KEY_USER,
+        approximate: bool = False,
+    ):
+        if key not in (KEY_USER, KEY_IP, KEY_USER_AND_IP):
+            raise ValueError(f"Unknown rate limit key: {key}")
+        if not 0 < cost <= limit:
+            raise ValueError("Rate limit cost must be between 1 and the limit")
+        
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.cost = cost
+        self.key = key
+        self.approximate = approximate
+    
+    def identifier(self, user_id: Optional[str], client_ip: str) -> str:
+        """Get the identifier a request is counted against."""
+        if self.key == KEY_IP or not user_id:
+            return client_ip
+        if self.key == KEY_USER_AND_IP:
+            return f"{user_id}:{client_ip}"
+        return user_id
+    
+    def __repr__(self) -> str:
+        return (
+            f"RateLimitPolicy({self.name!r}, limit={self.limit}, window={self.window}, "
+            f"cost={self.cost}, key={self.key!r})"
+        )
+
+
+def rate_limit_policy(policy: RateLimitPolicy) -> Callable[[F], F]:
+    """Attach a rate limit policy to an endpoint.
+    
+    Apply below the router decorator, so the policy is set before the
+    route is registered.
+    """
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, _POLICY_ATTRIBUTE, policy)
+        return endpoint
+    
+    return decorator
+
+
+# Budget shared by API routes without a policy of their own
+DEFAULT_API_POLICY = RateLimitPolicy(
+    "api",
+    limit=settings.RATE_LIMIT_PER_MINUTE,
+    window=60,
+    approximate=settings.RATE_LIMIT_API_APPROXIMATE,
+)
+
+
+class RateLimitPolicyTable:
+    """Compiled lookup from request method and path to policy.
+    
+    Routes without path parameters resolve with a single dict lookup;
+    templated routes are matched by their compiled path regex. Other
+    paths under prefix, including ones no route matches, fall back to
+    the default policy.
+    """
+    
+    def __init__(self, default: Optional[RateLimitPolicy], prefix: str):
+        self.default = default
+        self.prefix = prefix
+        self._static: Dict[Tuple[str, str], RateLimitPolicy] = {}
+        self._templated: List[Tuple[Pattern, FrozenSet[str], RateLimitPolicy]] = []
+    
+    def compile(self, routes: Iterable[BaseRoute]) -> None:
+        """Build the table from the application's routes."""
+        self._static.clear()
+        self._templated.clear()
+        
+        for route in routes:
+            if not isinstance(route, Route) or not route.methods:
+                continue
+            
+            policy = getattr(route.endpoint, _POLICY_ATTRIBUTE, None)
+            if policy is None:
+                continue
+            
+            if route.param_convertors:
+                self._templated.append((route.path_regex, frozenset(route.methods), policy))
+            else:
+                for method in route.methods:
+                    self._static[(method, route.path)] = policy
+    
+    def resolve(self, method: str, path: str) -> Optional[RateLimitPolicy]:
+        """Get the policy for a request, None if it is not rate limited."""
+        policy = self._static.get((method, path))
+        if policy is not None:
+            return policy
+        
+        for path_regex, methods, policy in self._templated:
+            if method in methods and path_regex.match(path):
+                return policy
+        
+        if path.startswith(self.prefix):
+            return self.default
+        return None
+
+
+policy_table = RateLimitPolicyTable(DEFAULT_API_POLICY, prefix="/api/v1/")
@@ -0,0 +1,158 @@
+"""
+Access token revocation.
+
+This module records revoked access tokens in the cache backend and keeps a
+per-worker Bloom filter of them, synced incrementally from a revocation log.
+Tokens the filter has never seen are accepted without a network round trip;
+only filter hits are confirmed against the backend.
+"""
+
+import asyncio
+import math
+import time
+from typing import List, Optional, Tuple
+
+from app.core.bloom import BloomFilter
+from app.core.cache import CacheKeys, get_cache
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.metrics import metrics
+
+# Revocations logged by other workers may carry slightly older timestamps
+# than ones already seen, so each sync rereads this far back
+_CLOCK_SKEW_SECONDS = 5.0
+
+
+class TokenRevocations:
+    """Revoked access tokens, as seen by this worker.
+    
+    Revocations on other workers become visible here within
+    TOKEN_REVOCATION_SYNC_SECONDS. The filter is rebuilt from the log once
+    per access token lifetime, dropping tokens that have since expired, or
+    sooner if it fills up.
+    """
+    
+    def __init__(self):
+        self.filter = self._new_filter(0)
+        self._synced_until = 0.0
+        self._rebuilt_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def _new_filter(entries: int) -> BloomFilter:
+        """Create an empty filter with room for twice entries."""
+        return BloomFilter(
+            max(settings.TOKEN_REVOCATION_FILTER_CAPACITY, entries * 2),
+            settings.TOKEN_REVOCATION_FILTER_ERROR_RATE,
+        )
+    
+    async def is_revoked(self, token_id: Optional[str]) -> bool:
+        """Check whether a token has been revoked.
+        
+        Filter misses are answered locally. A hit fails closed if the
+        backend cannot confirm it, since most hits are real revocations.
+        """
+        if token_id is None or token_id not in self.filter:
+            metrics.inc("token_revocation_checks_total", result="filter_miss")
+            return False
+        
+        backend = get_cache()
+        if backend is None:
+            # Without a backend the filter is the only record
+            metrics.inc("token_revocation_checks_total", result="revoked")
+            return True
+        
+        try:
+            value, _ = await backend.get(CacheKeys.revoked_token_key(token_id))
+        except Exception:
+            metrics.inc("token_revocation_checks_total", result="unconfirmed")
+            return True
+        
+        result = "revoked" if value is not None else "false_positive"
+        metrics.inc("token_revocation_checks_total", result=result)
+        return value is not None
+    
+    async def revoke(self, token_id: str, expires_at: float) -> None:
+        """Revoke a token until it expires.
+        
+        Raises ServiceUnavailableException if the revocation could not be
+        recorded for the other workers.
+        """
+        self.filter.add(token_id)
+        
+        backend = get_cache()
+        if backend is None:
+            return
+        
+        ttl = max(1, math.ceil(expires_at - time.time()))
+        try:
+            await backend.set(CacheKeys.revoked_token_key(token_id), b"1", ttl)
+            await backend.append_log(CacheKeys.revocation_log_key(), token_id, time.time())
+        except Exception:
+            raise ServiceUnavailableException(
+                "Token revocation is temporarily unavailable, please retry",
+                details={"retry_after": 1},
+            )
+    
+    async def sync(self) -> None:
+        """Pull revocations logged since the last sync into the filter."""
+        backend = get_cache()
+        if backend is None:
+            return
+        
+        log_key = CacheKeys.revocation_log_key()
+        now = time.time()
+        lifetime = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        
+        if now - self._rebuilt_at >= lifetime or len(self.filter) > self.filter.capacity:
+            # Tokens revoked a full lifetime ago have expired since
+            await backend.trim_log(log_key, now - lifetime)
+            entries = await backend.read_log(log_key, 0)
+            self.filter = self._build(entries)
+            self._rebuilt_at = now
+        else:
+            entries = await backend.read_log(log_key, self._synced_until - _CLOCK_SKEW_SECONDS)
+            for token_id, _ in entries:
+                if token_id not in self.filter:
+                    self.filter.add(token_id)
+        
+        if entries:
+            self._synced_until = max(self._synced_until, entries[-1][1])
+        metrics.set_gauge("token_revocation_filter_entries", len(self.filter))
+    
+    def _build(self, entries: List[Tuple[str, float]]) -> BloomFilter:
+        """Build a filter holding entries."""
+        bloom = self._new_filter(len(entries))
+        for token_id, _ in entries:
+            bloom.add(token_id)
+        return bloom
+    
+    async def _sync_forever(self) -> None:
+        """Sync on an interval until cancelled."""
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Keep the filter as is and try again on the next tick
+                pass
+            await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_SECONDS)
+    
+    async def start(self) -> None:
+        """Start syncing from the revocation log."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_forever())
+    
+    async def close(self) -> None:
+        """Stop syncing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocations = TokenRevocations()
@@ -11,14 +11,21 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app.core.cache import close_cache, start_cache
 from app.core.config import settings
 from app.core.database import engine, init_db
 from app.core.exceptions import AppException
+from app.core.heavy_hitters import heavy_hitters
+from app.core.metrics import metrics
+from app.core.rate_limit_policy import policy_table
+from app.core.rate_limiting import batched_limiter
+from app.core.revocation import revocations
+from app.core.security import calibrate_password_hashing, shutdown_password_hashing
 from app.middleware.rate_limit import RateLimitMiddleware
 from app.middleware.security import SecurityHeadersMiddleware
-from app.routers import auth, todos
+from app.routers import admin, auth, todos
 
 
 @asynccontextmanager
@@ -26,9 +33,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan context manager."""
     # Startup
     await init_db()
+    await start_cache()
+    await calibrate_password_hashing()
+    await revocations.start()
+    await batched_limiter.start()
+    await heavy_hitters.start()
     yield
     # Shutdown
-    # Cleanup if needed
+    await heavy_hitters.close()
+    await batched_limiter.close()
+    await revocations.close()
+    await close_cache()
+    shutdown_password_hashing()
 
 
 def create_app() -> FastAPI:
@@ -42,8 +58,11 @@ def create_app() -> FastAPI:
         openapi_url="/openapi.json" if settings.DEBUG else None,
         lifespan=lifespan,
     )
-
-    # Add middleware (order matters!)
+    
+    # Add middleware (order matters!). Later ones wrap earlier ones, so rate
+    # limit rejections still get the CORS and security headers, and CORS
+    # preflights are answered before being counted
+    app.add_middleware(RateLimitMiddleware)
     app.add_middleware(
         TrustedHostMiddleware,
         allowed_hosts=settings.ALLOWED_HOSTS,
@@ -54,15 +73,24 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
         allow_headers=["*"],
-        expose_headers=["X-Request-ID"],
+        expose_headers=[
+            "X-Request-ID",
+            "X-RateLimit-Limit",
+            "X-RateLimit-Remaining",
+            "X-RateLimit-Reset",
+            "Retry-After",
+        ],
     )
     app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(RateLimitMiddleware)
-
+    
     # Exception handlers
     @app.exception_handler(AppException)
     async def app_exception_handler(request, exc: AppException):
         """Handle application exceptions."""
+        headers = None
+        if "retry_after" in exc.details:
+            headers = {"Retry-After": str(exc.details["retry_after"])}
+        
         return JSONResponse(
             status_code=exc.status_code,
             content={
@@ -72,20 +100,25 @@ def create_app() -> FastAPI:
                     "details": exc.details,
                 }
             },
+            headers=headers,
         )
-
+    
     # Include routers
     app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
     app.include_router(
         todos.router, prefix="/api/v1/todos", tags=["Todos"]
     )
-
+    app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+    
+    # Resolve rate limit policies per route once, not per request
+    policy_table.compile(app.routes)
+    
     # Health check endpoints
     @app.get("/healthz")
     async def health_check():
         """Basic health check endpoint."""
         return {"status": "ok"}
-
+    
     @app.get("/readyz")
     async def readiness_check():
         """Readiness check endpoint."""
@@ -100,7 +133,16 @@ def create_app() -> FastAPI:
                 status_code=503,
                 content={"status": "not ready", "reason": "database unavailable"},
             )
-
+    
+    if settings.METRICS_ENABLED:
+        @app.get("/metrics", response_class=PlainTextResponse)
+        async def metrics_endpoint():
+            """Metrics endpoint in the Prometheus text format."""
+            return PlainTextResponse(
+                metrics.render(),
+                media_type="text/plain; version=0.0.4",
+            )
+    
     return app
 
 
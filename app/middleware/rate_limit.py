@@ -1,113 +1,161 @@
 """
 Rate limiting middleware.
 
-This module implements rate limiting using Redis to prevent abuse.
+This module implements rate limiting on the configured cache backend to
+prevent abuse, falling back to in-process limits when the backend is
+unavailable. Every rate limited request is also recorded in the heavy
+hitter summaries.
 """
 
-from typing import Optional
+import json
+import math
+import time
+from functools import lru_cache
+from typing import List, Tuple
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.core.cache import CacheKeys, get_redis
+from app.core.auth_context import get_auth_context
+from app.core.cache import CacheKeys, get_cache
+from app.core.cache_backends import RateLimitResult
 from app.core.config import settings
 from app.core.exceptions import RateLimitException
+from app.core.heavy_hitters import heavy_hitters
+from app.core.metrics import metrics
+from app.core.rate_limit_policy import RateLimitPolicy, policy_table
+from app.core.rate_limiting import batched_limiter, fallback_limiter
 
+# Health checks and metrics scrapes are never rate limited
+_EXEMPT_PATHS = frozenset(["/healthz", "/readyz", "/metrics"])
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware for rate limiting requests."""
+
+@lru_cache(maxsize=4096)
+def _rejection_body(retry_after: int) -> bytes:
+    """Render the 429 error body, once per retry_after value."""
+    exc = RateLimitException(
+        message="Rate limit exceeded",
+        details={"retry_after": retry_after},
+    )
+    # Same shape and encoding as the AppException handler's responses
+    content = {
+        "error": {
+            "code": exc.error_code,
+            "message": exc.message,
+            "details": exc.details,
+        }
+    }
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _rate_limit_headers(
+    policy: RateLimitPolicy, result: RateLimitResult
+) -> List[Tuple[bytes, bytes]]:
+    """Get the X-RateLimit headers for a checked request."""
+    return [
+        (b"x-ratelimit-limit", b"%d" % policy.limit),
+        (b"x-ratelimit-remaining", b"%d" % result.remaining),
+        (b"x-ratelimit-reset", b"%d" % math.ceil(result.reset_after)),
+    ]
+
+
+class RateLimitMiddleware:
+    """Middleware for rate limiting requests.
+    
+    Implemented as plain ASGI middleware: rejected requests are answered
+    with a prebuilt 429 response before routing, and allowed ones are
+    passed through untouched apart from the headers added to the
+    response start message.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
     
-    async def dispatch(self, request: Request, call_next):
-        """Apply rate limiting to request."""
-        if not settings.RATE_LIMIT_ENABLED:
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Apply rate limiting to the request."""
+        if (
+            scope["type"] != "http"
+            or not settings.RATE_LIMIT_ENABLED
+            or scope["path"] in _EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
         
-        # Skip rate limiting for health checks
-        if request.url.path in ["/healthz", "/readyz"]:
-            return await call_next(request)
+        # Routes declare their limits; requests without one pass through
+        policy = policy_table.resolve(scope["method"], scope["path"])
         
-        # Get identifier (IP address or user ID)
-        identifier = request.client.host if request.client else "unknown"
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
         
-        # Try to get user ID from token if available
-        user_id = None
-        auth_header = request.headers.get("authorization")
-        if auth_header:
-            try:
-                from app.core.security import decode_access_token
-                scheme, token = auth_header.split(" ", 1)
-                if scheme.lower() == "bearer":
-                    payload = decode_access_token(token)
-                    user_id = payload.get("sub")
-            except Exception:
-                pass
+        # Try to get user ID from token if available; the verification is
+        # kept on the scope for get_current_user
+        user_id = get_auth_context(scope).user_id
+        user_key = str(user_id) if user_id is not None else None
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
         
-        # Use user ID if available, otherwise use IP
-        identifier = str(user_id) if user_id else identifier
+        started = time.perf_counter()
+        try:
+            await self._limit(scope, receive, send, policy, policy.identifier(user_key, client_ip))
+        finally:
+            if settings.HEAVY_HITTERS_ENABLED:
+                # Rejected requests are counted too, abusive clients send most
+                heavy_hitters.record(user_key, client_ip, time.perf_counter() - started)
+    
+    async def _limit(
+        self, scope: Scope, receive: Receive, send: Send, policy: RateLimitPolicy, identifier: str
+    ) -> None:
+        """Reject the request if over its limit, else pass it on with the limit headers."""
+        result = await self._check_rate_limit(identifier, policy)
+        headers = _rate_limit_headers(policy, result)
         
-        # Determine action type
-        action = self._get_action(request.url.path, request.method)
+        if not result.allowed:
+            retry_after = max(1, math.ceil(result.retry_after))
+            body = _rejection_body(retry_after)
+            headers.extend([
+                (b"content-type", b"application/json"),
+                (b"content-length", b"%d" % len(body)),
+                (b"retry-after", b"%d" % retry_after),
+            ])
+            await send({"type": "http.response.start", "status": 429, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
         
-        if action:
-            # Check rate limit
-            if await self._check_rate_limit(identifier, action):
-                raise RateLimitException(
-                    message="Rate limit exceeded",
-                    details={"retry_after": 60},
-                )
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
         
-        response = await call_next(request)
+        await self.app(scope, receive, send_with_headers)
+    
+    async def _check_rate_limit(
+        self, identifier: str, policy: RateLimitPolicy
+    ) -> RateLimitResult:
+        """Count the request against its limit.
         
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(settings.RATE_LIMIT_PER_MINUTE)
+        Without a reachable cache backend, each worker enforces its share
+        of the limit in process instead of failing open.
+        """
+        backend = get_cache()
+        action, limit, window, cost = policy.name, policy.limit, policy.window, policy.cost
+        cache_key = CacheKeys.rate_limit_key(identifier, action)
         
-        return response
-    
-    def _get_action(self, path: str, method: str) -> Optional[str]:
-        """Determine action type for rate limiting."""
-        if path == "/api/v1/auth/login" and method == "POST":
-            return "login"
-        elif path == "/api/v1/auth/register" and method == "POST":
-            return "register"
-        elif path.startswith("/api/v1/"):
-            return "api"
-        return None
-    
-    async def _check_rate_limit(self, identifier: str, action: str) -> bool:
-        """Check if rate limit is exceeded."""
-        redis_client = await get_redis()
+        if backend is None or not backend.available:
+            metrics.inc("rate_limit_fallback_total", action=action)
+            return fallback_limiter.hit(cache_key, limit, window, cost)
         
-        if not redis_client:
-            # If Redis is unavailable, don't rate limit
-            return False
+        # Approximate policies, such as generic API traffic, are decided
+        # locally and synced in the background, unless the local counters
+        # are full; login and registration are always counted exactly
+        if policy.approximate:
+            result = batched_limiter.hit(identifier, action, limit, window, cost)
+            if result is not None:
+                return result
         
         try:
-            cache_key = CacheKeys.rate_limit_key(identifier, action)
-            
-            # Determine limit and window based on action
-            if action == "login":
-                limit = settings.RATE_LIMIT_LOGIN_ATTEMPTS
-                window = settings.RATE_LIMIT_LOGIN_WINDOW_MINUTES * 60
-            elif action == "register":
-                limit = settings.RATE_LIMIT_REGISTRATION_ATTEMPTS
-                window = settings.RATE_LIMIT_REGISTRATION_WINDOW_HOURS * 3600
-            else:
-                limit = settings.RATE_LIMIT_PER_MINUTE
-                window = 60
-            
-            # Get current count
-            current = await redis_client.get(cache_key)
-            count = int(current) if current else 0
-            
-            if count >= limit:
-                return True
-            
-            # Increment count
-            await redis_client.incr(cache_key)
-            await redis_client.expire(cache_key, window)
-            
-            return False
+            return await backend.rate_limit(cache_key, limit, window, cost)
         except Exception:
-            # If Redis fails, allow request (fail open)
-            return False
-
+            metrics.inc("rate_limit_fallback_total", action=action)
+            return fallback_limiter.hit(cache_key, limit, window, cost)
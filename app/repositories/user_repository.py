@@ -6,7 +6,8 @@ This module provides data access layer for user-related operations.
 
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import User
@@ -24,22 +25,37 @@ class UserRepository:
         return result.scalar_one_or_none()
     
     async def get_by_email(self, email: str) -> Optional[User]:
-        """Get user by email."""
-        result = await self.db.execute(select(User).where(User.email == email))
+        """Get user by email, ignoring case."""
+        result = await self.db.execute(
+            select(User).where(func.lower(User.email) == email.lower())
+        )
         return result.scalar_one_or_none()
     
-    async def create(self, email: str, password_hash: str) -> User:
-        """Create a new user."""
-        user = User(email=email, password_hash=password_hash)
-        self.db.add(user)
-        await self.db.flush()
-        await self.db.refresh(user)
-        return user
-    
     async def exists_by_email(self, email: str) -> bool:
-        """Check if user exists by email."""
+        """Check if user exists by email, ignoring case; an index-only probe."""
         result = await self.db.execute(
-            select(User.id).where(User.email == email).limit(1)
+            select(User.id).where(func.lower(User.email) == email.lower()).limit(1)
         )
         return result.scalar_one_or_none() is not None
-
+    
+    async def create_if_absent(self, email: str, password_hash: str) -> Optional[User]:
+        """Create a new user in one statement, returning None if the email is taken.
+        
+        Uses INSERT ... ON CONFLICT DO NOTHING RETURNING on the lower(email)
+        index, so concurrent signups for one email, in any case, cannot
+        race past each other.
+        """
+        result = await self.db.execute(
+            insert(User)
+            .values(email=email, password_hash=password_hash)
+            .on_conflict_do_nothing(index_elements=[func.lower(User.email)])
+            .returning(User)
+        )
+        return result.scalar_one_or_none()
+    
+    async def update_password_hash(self, user: User, password_hash: str) -> User:
+        """Replace a user's password hash."""
+        user.password_hash = password_hash
+        await self.db.flush()
+        await self.db.refresh(user)
+        return user
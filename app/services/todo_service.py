@@ -5,16 +5,31 @@ This module provides business logic for todo operations including
 CRUD operations with caching support.
 """
 
-from typing import List, Optional
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.cache import CacheKeys, get_redis
+from app.core.cache import (
+    CacheKeys,
+    cache_get_or_load,
+    get_cache,
+    get_generation,
+    pending_invalidations,
+)
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
 from app.core.exceptions import NotFoundException
-from app.models import Todo, User
+from app.models import User
 from app.repositories.todo_repository import TodoRepository
 from app.schemas import TodoCreate, TodoResponse, TodoUpdate
 
+# Channel on which committed todo changes are announced
+TODO_EVENTS_CHANNEL = "events:todos"
+
+# Warm-up tasks in progress, referenced so they are not garbage collected
+_warmup_tasks: Set[asyncio.Task] = set()
+
 
 class TodoService:
     """Service for todo operations."""
@@ -25,76 +40,74 @@ class TodoService:
     
     async def get_all(self, user: User) -> List[TodoResponse]:
         """Get all todos for a user with caching."""
-        redis_client = await get_redis()
-        cache_key = CacheKeys.user_todos_key(user.id)
-        
-        # Try cache first
-        if redis_client:
-            try:
-                cached = await redis_client.get(cache_key)
-                if cached:
-                    # In production, use proper deserialization
-                    # For now, bypass cache and fetch from DB
-                    pass
-            except Exception:
-                # Cache error shouldn't break the app
-                pass
-        
-        # Fetch from database
-        todos = await self.todo_repo.get_all_by_user(user.id)
-        
-        # Cache result
-        if redis_client:
-            try:
-                # In production, serialize properly
-                # For now, cache with short TTL
-                await redis_client.setex(cache_key, 60, "cached")
-            except Exception:
-                pass
-        
-        return [TodoResponse.model_validate(todo) for todo in todos]
+        items = await self._get_todo_items(user.id)
+        return [TodoResponse.model_validate(item) for item in items]
+    
+    async def _get_todo_items(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get a user's todos in cacheable form, reading through the cache."""
+        generation = await get_generation(CacheKeys.user_generation_key(user_id))
+        
+        if generation is None:
+            items = await self._load_todos(user_id)
+        else:
+            # Cache hits never touch the database, and concurrent misses
+            # share a single query
+            items = await cache_get_or_load(
+                CacheKeys.user_todos_key(user_id, generation),
+                lambda: self._load_todos(user_id),
+                settings.CACHE_TODO_LIST_TTL_SECONDS,
+                refresher=lambda: _load_in_new_session(
+                    lambda service: service._load_todos(user_id)
+                ),
+            )
+        
+        return items
     
     async def get_by_id(self, todo_id: int, user: User) -> TodoResponse:
         """Get a todo by ID."""
-        redis_client = await get_redis()
-        cache_key = CacheKeys.todo_key(todo_id)
-        
-        # Try cache first
-        if redis_client:
-            try:
-                cached = await redis_client.get(cache_key)
-                if cached:
-                    # In production, use proper deserialization
-                    pass
-            except Exception:
-                pass
+        user_id = user.id
+        generation = await get_generation(CacheKeys.user_generation_key(user_id))
+        
+        if generation is None:
+            item = await self._load_todo(todo_id, user_id)
+        else:
+            # Misses are cached too, so polling for deleted or foreign IDs
+            # stays off the database; any write by the user clears them by
+            # bumping the generation
+            item = await cache_get_or_load(
+                CacheKeys.todo_key(todo_id, user_id, generation),
+                lambda: self._load_todo(todo_id, user_id),
+                settings.CACHE_TODO_TTL_SECONDS,
+                refresher=lambda: _load_in_new_session(
+                    lambda service: service._load_todo(todo_id, user_id)
+                ),
+                negative_ttl=settings.CACHE_NEGATIVE_TTL_SECONDS,
+            )
+        
+        if item is None:
+            raise NotFoundException("Todo not found")
         
-        todo = await self.todo_repo.get_by_id(todo_id, user.id)
+        return TodoResponse.model_validate(item)
+    
+    async def _load_todos(self, user_id: int) -> List[Dict[str, Any]]:
+        """Load a user's todos from the database in cacheable form."""
+        todos = await self.todo_repo.get_all_by_user(user_id)
+        return [TodoResponse.model_validate(todo).model_dump(mode="json") for todo in todos]
+    
+    async def _load_todo(self, todo_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Load a single todo from the database in cacheable form."""
+        todo = await self.todo_repo.get_by_id(todo_id, user_id)
         
         if todo is None:
-            raise NotFoundException("Todo not found")
+            return None
         
-        # Cache result
-        if redis_client:
-            try:
-                await redis_client.setex(cache_key, 300, "cached")
-            except Exception:
-                pass
-        
-        return TodoResponse.model_validate(todo)
+        return TodoResponse.model_validate(todo).model_dump(mode="json")
     
     async def create(self, request: TodoCreate, user: User) -> TodoResponse:
         """Create a new todo."""
         todo = await self.todo_repo.create(user.id, request.title, request.description)
         
-        # Invalidate user's todos cache
-        redis_client = await get_redis()
-        if redis_client:
-            try:
-                cache_key = CacheKeys.user_todos_key(user.id)
-                await redis_client.delete(cache_key)
-            except Exception:
-                pass
+        self._record_change("created", todo.id, user.id)
         
         return TodoResponse.model_validate(todo)
     
@@ -113,14 +126,7 @@ class TodoService:
             completed=request.completed,
         )
         
-        # Invalidate caches
-        redis_client = await get_redis()
-        if redis_client:
-            try:
-                await redis_client.delete(CacheKeys.todo_key(todo_id))
-                await redis_client.delete(CacheKeys.user_todos_key(user.id))
-            except Exception:
-                pass
+        self._record_change("updated", todo_id, user.id)
         
         return TodoResponse.model_validate(todo)
     
@@ -133,12 +139,45 @@ class TodoService:
         
         await self.todo_repo.delete(todo)
         
-        # Invalidate caches
-        redis_client = await get_redis()
-        if redis_client:
-            try:
-                await redis_client.delete(CacheKeys.todo_key(todo_id))
-                await redis_client.delete(CacheKeys.user_todos_key(user.id))
-            except Exception:
-                pass
+        self._record_change("deleted", todo_id, user.id)
+    
+    def _record_change(self, action: str, todo_id: int, user_id: int) -> None:
+        """Invalidate the user's cached todos and announce the change.
+        
+        Both only take effect once the request's transaction commits.
+        """
+        batch = pending_invalidations(self.db)
+        batch.bump_generation(CacheKeys.user_generation_key(user_id))
+        batch.publish(
+            TODO_EVENTS_CHANNEL,
+            {"event": f"todo.{action}", "user_id": user_id, "todo_id": todo_id},
+        )
+
+
+async def _load_in_new_session(load: Callable[[TodoService], Awaitable[Any]]) -> Any:
+    """Run a loader in its own session, for refreshes outliving the request."""
+    async with AsyncSessionLocal() as session:
+        return await load(TodoService(session))
+
 
+async def _warm_cache(user_id: int) -> None:
+    """Load a user's todo list into the cache."""
+    try:
+        await _load_in_new_session(lambda service: service._get_todo_items(user_id))
+    except Exception:
+        # Warm-up is best effort; the first request loads the list instead
+        pass
+
+
+def schedule_cache_warmup(user_id: int) -> None:
+    """Start loading a user's todo list into the cache in the background.
+    
+    Called on login so the client's first list request is a cache hit, or
+    joins the load already in flight on this worker.
+    """
+    if not settings.CACHE_WARM_ON_LOGIN or get_cache() is None:
+        return
+    
+    task = asyncio.create_task(_warm_cache(user_id))
+    _warmup_tasks.add(task)
+    task.add_done_callback(_warmup_tasks.discard)
@@ -0,0 +1,91 @@
+"""
+User service layer.
+
+This module provides the authenticated principal cache, which lets
+requests resolve the user behind a token without a database query.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import CacheKeys, cache_get_or_load, cache_set, pending_invalidations
+from app.core.config import settings
+from app.models import User
+from app.repositories.user_repository import UserRepository
+
+
+class UserService:
+    """Service for user lookups."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.user_repo = UserRepository(db)
+    
+    async def get_principal(self, user_id: int) -> Optional[User]:
+        """Get the user behind a token, reading through the cache.
+        
+        The returned user is not attached to the session; only its columns
+        other than the password hash are available.
+        """
+        principal = await cache_get_or_load(
+            CacheKeys.user_key(user_id),
+            lambda: self._load_principal(user_id),
+            settings.CACHE_PRINCIPAL_TTL_SECONDS,
+            negative_ttl=settings.CACHE_NEGATIVE_TTL_SECONDS,
+        )
+        
+        if principal is None:
+            return None
+        
+        return principal_to_user(principal)
+    
+    async def _load_principal(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Load a user from the database in cacheable form."""
+        user = await self.user_repo.get_by_id(user_id)
+        
+        if user is None:
+            return None
+        
+        return user_to_principal(user)
+    
+    def invalidate_principal(self, user_id: int) -> None:
+        """Drop a user's cached principal once the transaction commits.
+        
+        Must be called whenever a user is changed or deleted.
+        """
+        pending_invalidations(self.db).delete(CacheKeys.user_key(user_id))
+
+
+def user_to_principal(user: User) -> Dict[str, Any]:
+    """Get the cacheable form of a user, leaving out the password hash."""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+    }
+
+
+def principal_to_user(principal: Dict[str, Any]) -> User:
+    """Build a detached user from its cacheable form."""
+    return User(
+        id=principal["id"],
+        email=principal["email"],
+        created_at=_parse_datetime(principal["created_at"]),
+        updated_at=_parse_datetime(principal["updated_at"]),
+    )
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+async def cache_principal(user: User) -> None:
+    """Store a user's principal, so its first authenticated request is a hit."""
+    await cache_set(
+        CacheKeys.user_key(user.id),
+        user_to_principal(user),
+        settings.CACHE_PRINCIPAL_TTL_SECONDS,
+    )
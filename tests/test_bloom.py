@@ -0,0 +1,35 @@
+"""
+Tests for the Bloom filter.
+"""
+
+from app.core.bloom import BloomFilter
+
+
+def test_added_items_are_always_present():
+    """There are no false negatives."""
+    bloom = BloomFilter(1000, 0.01)
+    items = [f"token-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert len(bloom) == 1000
+    assert all(item in bloom for item in items)
+
+
+def test_false_positive_rate():
+    """Absent items are rarely reported present, at capacity."""
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"token-{i}")
+
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+
+    assert false_positives < 200
+
+
+def test_empty_filter():
+    """An empty filter holds nothing."""
+    bloom = BloomFilter(10)
+
+    assert "token" not in bloom
+    assert len(bloom) == 0
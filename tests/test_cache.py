@@ -0,0 +1,243 @@
+"""
+Tests for read-through caching.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import cache, database
+from app.core.cache import (
+    MISSING,
+    CacheInvalidationBatch,
+    CacheKeys,
+    cache_get,
+    cache_get_or_load,
+    cache_set,
+    get_cache,
+    pending_invalidations,
+)
+from app.core.database import get_db
+from app.core.metrics import metrics
+
+
+def test_concurrent_misses_share_one_load():
+    """Concurrent misses for a key run its loader once."""
+    key = CacheKeys.user_key(1)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(cache_get_or_load(key, loader, 60) for _ in range(10))
+        )
+        assert results == [{"id": 1}] * 10
+        # Served from the cache from now on
+        assert await cache_get_or_load(key, loader, 60) == {"id": 1}
+
+    asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert metrics.get("cache_misses_total", keyspace="user") == 10
+    assert metrics.get("cache_hits_total", keyspace="user") == 1
+
+
+def test_waiter_takes_over_after_leader_is_cancelled():
+    """A caller waiting on a cancelled load runs the loader itself."""
+    key = CacheKeys.user_key(2)
+    leader_started = asyncio.Event()
+
+    async def stuck_loader():
+        leader_started.set()
+        await asyncio.sleep(60)
+
+    async def loader():
+        return {"id": 2}
+
+    async def scenario():
+        leader = asyncio.create_task(cache_get_or_load(key, stuck_loader, 60))
+        await leader_started.wait()
+        waiter = asyncio.create_task(cache_get_or_load(key, loader, 60))
+        # Let the waiter start waiting on the leader's load
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == {"id": 2}
+        assert leader.cancelled()
+        assert await cache_get(key) == {"id": 2}
+
+    asyncio.run(scenario())
+
+
+def test_negative_entries_skip_the_loader():
+    """A load that finds nothing is cached as a negative entry."""
+    key = CacheKeys.user_key(3)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return None
+
+    async def scenario():
+        assert await cache_get_or_load(key, loader, 60, negative_ttl=60) is None
+        assert await cache_get_or_load(key, loader, 60, negative_ttl=60) is None
+        assert await cache_get(key) is MISSING
+
+    asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert metrics.get("cache_misses_total", keyspace="user") == 1
+    assert metrics.get("cache_hits_total", keyspace="user") == 2
+
+
+def test_cache_operations_are_timed():
+    """Every backend operation is recorded in the latency histogram."""
+    key = CacheKeys.user_key(4)
+
+    async def loader():
+        return {"id": 4}
+
+    asyncio.run(cache_get_or_load(key, loader, 60))
+
+    for operation in ("get", "set"):
+        histogram = metrics.get_histogram(
+            "cache_operation_seconds", keyspace="user", operation=operation
+        )
+        assert histogram["count"] == 1
+
+
+def test_cache_hits_and_misses_are_counted():
+    """Reads are counted as hits or misses under their keyspace."""
+    key = CacheKeys.user_key(5)
+
+    async def scenario():
+        assert await cache_get(key) is None
+        await cache_set(key, {"id": 5}, 60)
+        assert await cache_get(key) == {"id": 5}
+
+    asyncio.run(scenario())
+
+    assert metrics.get("cache_misses_total", keyspace="user") == 1
+    assert metrics.get("cache_hits_total", keyspace="user") == 1
+
+
+class FakeSession:
+    """Stands in for a database session that commits or rolls back."""
+
+    def __init__(self):
+        self.info = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def test_invalidations_apply_after_commit(monkeypatch):
+    """Queued invalidations wait for the transaction to commit."""
+    monkeypatch.setattr(database, "AsyncSessionLocal", FakeSession)
+    key = CacheKeys.user_key(6)
+
+    async def scenario():
+        await cache_set(key, {"id": 6}, 60)
+        sessions = get_db()
+        session = await sessions.__anext__()
+        pending_invalidations(session).delete(key)
+
+        assert await cache_get(key) == {"id": 6}
+        with pytest.raises(StopAsyncIteration):
+            await sessions.__anext__()
+        assert await cache_get(key) is None
+
+    asyncio.run(scenario())
+
+
+def test_invalidations_dropped_on_rollback(monkeypatch):
+    """A rolled back transaction leaves the cache alone."""
+    monkeypatch.setattr(database, "AsyncSessionLocal", FakeSession)
+    key = CacheKeys.user_key(7)
+
+    async def scenario():
+        await cache_set(key, {"id": 7}, 60)
+        sessions = get_db()
+        session = await sessions.__anext__()
+        pending_invalidations(session).delete(key)
+
+        with pytest.raises(RuntimeError):
+            await sessions.athrow(RuntimeError("request failed"))
+        assert await cache_get(key) == {"id": 7}
+        assert database._AFTER_COMMIT_HOOKS not in session.info
+
+    asyncio.run(scenario())
+
+
+def _failing_invalidations(monkeypatch, failures: int):
+    """Make the backend's next failures invalidations fail."""
+    monkeypatch.setattr(cache, "_INVALIDATION_RETRY_DELAY_SECONDS", 0)
+    backend = get_cache()
+    invalidate = backend.invalidate
+    remaining = [failures]
+
+    async def flaky_invalidate(*args):
+        if remaining[0]:
+            remaining[0] -= 1
+            raise ConnectionError("cache unavailable")
+        return await invalidate(*args)
+
+    monkeypatch.setattr(backend, "invalidate", flaky_invalidate)
+
+
+def test_failed_invalidation_is_retried(monkeypatch):
+    """A batch that fails once is applied by the retry."""
+    key = CacheKeys.user_key(8)
+
+    async def scenario():
+        await cache_set(key, {"id": 8}, 60)
+        _failing_invalidations(monkeypatch, 1)
+        batch = CacheInvalidationBatch()
+        batch.delete(key)
+
+        await batch.flush()
+        await asyncio.sleep(0.01)
+
+        assert await cache_get(key) is None
+
+    asyncio.run(scenario())
+
+    assert metrics.get("cache_invalidation_retries_total") == 1
+    assert metrics.get("cache_invalidation_batches_dropped_total") == 0
+
+
+def test_invalidation_dropped_after_retry(monkeypatch):
+    """A batch that fails again on retry is counted as dropped."""
+    key = CacheKeys.user_key(9)
+
+    async def scenario():
+        await cache_set(key, {"id": 9}, 60)
+        _failing_invalidations(monkeypatch, 2)
+        batch = CacheInvalidationBatch()
+        batch.delete(key)
+
+        await batch.flush()
+        await asyncio.sleep(0.01)
+
+        assert await cache_get(key) == {"id": 9}
+
+    asyncio.run(scenario())
+
+    assert metrics.get("cache_invalidation_batches_dropped_total") == 1
@@ -0,0 +1,111 @@
+"""
+Tests for the circuit breaker.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+async def _healthy():
+    pass
+
+
+async def _failing():
+    raise ConnectionError("unavailable")
+
+
+async def _hanging():
+    await asyncio.sleep(60)
+
+
+def _breaker(probe=_healthy, min_backoff=60.0):
+    """A breaker opening after two failures, probing after min_backoff."""
+    return CircuitBreaker(
+        "test", probe, failure_threshold=2, min_backoff=min_backoff, max_backoff=60.0
+    )
+
+
+def test_opens_after_consecutive_failures():
+    """Once open, calls fail without reaching the dependency."""
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        raise ConnectionError("unavailable")
+
+    async def scenario():
+        breaker = _breaker()
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.call(operation, 1)
+
+        assert breaker.is_open
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(operation, 1)
+        await breaker.close()
+
+    asyncio.run(scenario())
+
+    assert len(calls) == 2
+
+
+def test_success_resets_failures():
+    """Only consecutive failures open the circuit."""
+    async def scenario():
+        breaker = _breaker()
+        with pytest.raises(ConnectionError):
+            await breaker.call(_failing, 1)
+        await breaker.call(_healthy, 1)
+        with pytest.raises(ConnectionError):
+            await breaker.call(_failing, 1)
+
+        assert not breaker.is_open
+
+    asyncio.run(scenario())
+
+
+def test_timeouts_count_as_failures():
+    """Calls are cut off at their deadline and count towards opening."""
+    async def scenario():
+        breaker = _breaker()
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await breaker.call(_hanging, 0.01)
+
+        assert breaker.is_open
+        await breaker.close()
+
+    asyncio.run(scenario())
+
+
+def test_probe_closes_circuit():
+    """The circuit closes on the first successful probe."""
+    probes = []
+
+    async def probe():
+        probes.append(1)
+        if len(probes) < 3:
+            raise ConnectionError("unavailable")
+
+    async def scenario():
+        breaker = _breaker(probe, min_backoff=0.001)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.call(_failing, 1)
+        assert breaker.is_open
+
+        for _ in range(100):
+            if not breaker.is_open:
+                break
+            await asyncio.sleep(0.01)
+
+        assert not breaker.is_open
+        assert breaker.consecutive_failures == 0
+        await breaker.call(_healthy, 1)
+
+    asyncio.run(scenario())
+
+    assert len(probes) == 3
@@ -0,0 +1,93 @@
+"""
+Tests for heavy hitter detection.
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from app.core.heavy_hitters import SpaceSaving, merge_snapshots
+
+
+def _stream(length: int, seed: int = 1):
+    """A skewed stream of keys, with a long tail of one-off keys."""
+    rng = random.Random(seed)
+    return [
+        f"heavy{int(rng.paretovariate(1.1))}"
+        if rng.random() < 0.7
+        else f"tail{rng.randrange(10**6)}"
+        for _ in range(length)
+    ]
+
+
+def test_space_saving_error_bounds():
+    """Counts are upper bounds, off by at most their error."""
+    stream = _stream(50000)
+    true_counts = Counter(stream)
+    summary = SpaceSaving(50)
+    for key in stream:
+        summary.add(key, 0.001)
+
+    snapshot = summary.snapshot()
+
+    assert len(summary) == 50
+    assert snapshot["total"] == len(stream)
+    assert sum(count for _, count, _, _ in snapshot["entries"]) == len(stream)
+    for key, count, error, latency in snapshot["entries"]:
+        assert count - error <= true_counts[key] <= count
+
+    tracked = {key for key, _, _, _ in snapshot["entries"]}
+    for key, count in true_counts.items():
+        if count > len(stream) / 50:
+            assert key in tracked
+
+
+def test_space_saving_latency():
+    """Latency is summed over the requests seen while tracked."""
+    summary = SpaceSaving(2)
+    summary.add("a", 0.5)
+    summary.add("a", 0.25)
+    summary.add("b", 1.0)
+
+    entries = {
+        key: (count, error, latency)
+        for key, count, error, latency in summary.snapshot()["entries"]
+    }
+
+    assert entries == {"a": (2, 0, 0.75), "b": (1, 0, 1.0)}
+
+
+def test_merge_snapshots_error_bounds():
+    """Merged counts stay upper bounds, off by at most their error."""
+    stream = _stream(50000, seed=2)
+    true_counts = Counter(stream)
+    summaries = [SpaceSaving(50), SpaceSaving(50)]
+    for index, key in enumerate(stream):
+        summaries[index % 2].add(key, 0.002)
+
+    merged = merge_snapshots([summary.snapshot() for summary in summaries], 10)
+
+    assert merged["total"] == len(stream)
+    heaviest = [key for key, _ in true_counts.most_common(3)]
+    assert [entry["key"] for entry in merged["top"][:3]] == heaviest
+    for entry in merged["top"]:
+        assert entry["count"] - entry["error"] <= true_counts[entry["key"]] <= entry["count"]
+        assert entry["mean_latency_seconds"] == pytest.approx(0.002)
+
+
+def test_merge_snapshots_missing_keys():
+    """A key missing from a full summary may have been seen min_count times there."""
+    full = SpaceSaving(1)
+    full.add("a")
+    full.add("b")
+    partial = SpaceSaving(10)
+    partial.add("c")
+
+    merged = merge_snapshots([full.snapshot(), partial.snapshot()], 10)
+    top = {entry["key"]: entry for entry in merged["top"]}
+
+    # "b" replaced "a" in the full summary, inheriting its count as error
+    assert (top["b"]["count"], top["b"]["error"]) == (2, 1)
+    # "c" is missing from the full summary, whose min_count is 2
+    assert (top["c"]["count"], top["c"]["error"]) == (3, 2)
@@ -0,0 +1,102 @@
+"""
+Tests for rate limiting.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import rate_limiting
+from app.core.cache import get_cache
+from app.core.metrics import metrics
+from app.core.rate_limiting import BatchedRateLimiter, FallbackRateLimiter
+
+
+def test_memory_backend_rate_limit():
+    """The memory backend spaces requests evenly over the window."""
+    async def scenario():
+        backend = get_cache()
+        results = [await backend.rate_limit("rate_limit:api:a", 3, 60) for _ in range(4)]
+
+        assert [result.allowed for result in results] == [True, True, True, False]
+        assert [result.remaining for result in results[:3]] == [2, 1, 0]
+        # The next request fits once one interval of the window has passed
+        assert results[3].retry_after == pytest.approx(20, abs=0.5)
+        assert results[3].reset_after == pytest.approx(60, abs=0.5)
+
+    asyncio.run(scenario())
+
+
+def test_memory_backend_rate_limit_cost():
+    """Requests costing more use up the limit faster."""
+    async def scenario():
+        backend = get_cache()
+        results = [
+            await backend.rate_limit("rate_limit:export:a", 10, 60, 4) for _ in range(3)
+        ]
+
+        assert [result.allowed for result in results] == [True, True, False]
+        assert [result.remaining for result in results[:2]] == [6, 2]
+
+    asyncio.run(scenario())
+
+
+def test_fallback_limiter_retry_after(monkeypatch):
+    """Denied requests wait until enough of the oldest leave the window."""
+    now = [0.0]
+    monkeypatch.setattr(rate_limiting.time, "monotonic", lambda: now[0])
+    limiter = FallbackRateLimiter(max_keys=10, workers=1)
+
+    for at in (0.0, 10.0, 20.0):
+        now[0] = at
+        assert limiter.hit("a", 3, 60).allowed
+
+    now[0] = 30.0
+    denied = limiter.hit("a", 3, 60)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(30)
+    # Two units need the two oldest requests gone
+    assert limiter.hit("a", 3, 60, cost=2).retry_after == pytest.approx(40)
+
+    now[0] = 60.5
+    assert limiter.hit("a", 3, 60).allowed
+
+
+def test_fallback_limiter_bounds():
+    """Limits are shared between workers and the least recent keys evicted."""
+    limiter = FallbackRateLimiter(max_keys=2, workers=2)
+
+    assert [limiter.hit("a", 3, 60).allowed for _ in range(3)] == [True, True, False]
+
+    limiter.hit("b", 3, 60)
+    limiter.hit("c", 3, 60)
+    assert len(limiter) == 2
+    # Evicted, so counted afresh
+    assert limiter.hit("a", 3, 60).allowed
+
+
+def test_batched_limiter_counts_locally():
+    """Hits are denied locally once the limit is used up."""
+    limiter = BatchedRateLimiter(max_counters=10)
+
+    results = [limiter.hit("a", "api", 2, 60) for _ in range(3)]
+
+    assert [result.allowed for result in results] == [True, True, False]
+
+
+def test_batched_limiter_overflow():
+    """Beyond its counters, the limiter leaves requests to an exact check."""
+    limiter = BatchedRateLimiter(max_counters=2)
+
+    assert limiter.hit("a", "api", 10, 60) is not None
+    assert limiter.hit("b", "api", 10, 60) is not None
+    # Both counters have hits still to sync
+    assert limiter.hit("c", "api", 10, 60) is None
+    assert metrics.get("rate_limit_local_overflow_total", action="api") == 1
+
+    asyncio.run(limiter.sync())
+
+    assert metrics.get("rate_limit_synced_hits_total") == 2
+    # Synced counters make room
+    assert limiter.hit("c", "api", 10, 60) is not None
+    assert metrics.get("rate_limit_local_overflow_total", action="api") == 1